@@ -19,6 +19,18 @@ ALL_STREAM_RECORD_MAX_SIZE = BYTES_OF_2GB
 RECORD_FILE_PATH = "./live"
 
 
+def extract_record_timestamp(file_name: str) -> int:
+    """Epoch milliseconds from an SRS dvr file name, 0 if it has none."""
+    # format: stream.[date.time.]timestamp_ms.ext, e.g. hehe.2024-03-22.05:41:56.1711086116534.flv
+    parts = file_name.split(".")
+    if len(parts) < 3:
+        return 0
+    try:
+        return int(parts[-2])
+    except ValueError:
+        return 0
+
+
 class RecordFileBaseModel(BaseModel):
     file_name: str
     timestamp: int
@@ -1,7 +1,14 @@
 import logging.handlers
 import logging.config
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
 import os
+import signal
+import time
 import traceback
 import logging
 import yaml
@@ -9,10 +16,13 @@ import urllib.parse
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Query, Request, status
 from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 
+from backlog import ingest_backlog_on_startup
+from record_listing import GZIP_LEVEL, GZIP_MIN_SIZE, InvalidCursor
+from tracing import sample_event_loop
 from webdav_record_manager import WebDavRecordManager
 
 log_config = None
@@ -30,6 +40,8 @@ for handle in logger.handlers:
 
 
 record_mgr: WebDavRecordManager | None = None
+SSE_HEARTBEAT_INTERVAL = 15
+_profile_lock = asyncio.Lock()
 
 
 @asynccontextmanager
@@ -39,8 +51,38 @@ async def lifespan(app: FastAPI):
     logger.info("init webdav record manager")
     record_mgr = WebDavRecordManager()
     await record_mgr.init()
+    backlog_task = None
+    # Only the leader ingests, otherwise every worker would upload the same files
+    if record_mgr.backlog_on_startup and record_mgr.is_leader:
+        backlog_task = asyncio.create_task(
+            ingest_backlog_on_startup(record_mgr, record_mgr.backlog_concurrency, record_mgr.backlog_settle_seconds)
+        )
+    # uvicorn waits for open responses before running lifespan shutdown, so end SSE streams on the signal itself
+    loop = asyncio.get_running_loop()
+    previous_handlers = {}
+
+    def _on_exit_signal(signum, frame):
+        loop.call_soon_threadsafe(record_mgr.events.close_subscribers)
+        previous = previous_handlers.get(signum)
+        if callable(previous):
+            previous(signum, frame)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            previous_handlers[signum] = signal.signal(signum, _on_exit_signal)
+        except ValueError:
+            # Not running in the main thread
+            pass
     yield
     # Clean up
+    for signum, previous in previous_handlers.items():
+        signal.signal(signum, previous)
+    if backlog_task is not None and not backlog_task.done():
+        backlog_task.cancel()
+        try:
+            await backlog_task
+        except asyncio.CancelledError:
+            pass
     await record_mgr.close()
 
 
@@ -57,6 +99,59 @@ app.add_middleware(
 )
 
 
+class TraceApiHandlers:
+    """Pure ASGI middleware, so streamed bodies pass through without BaseHTTPMiddleware's extra task and queue."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or record_mgr is None:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        body_start = None
+        path = scope.get("path", "")
+
+        def _stage() -> str:
+            # Stats are keyed by endpoint name; file names in paths would blow up the key space
+            endpoint = scope.get("endpoint")
+            return f"api.{endpoint.__name__}" if endpoint is not None else "api.unmatched"
+
+        async def _send(message) -> None:
+            nonlocal body_start
+            if message["type"] == "http.response.start" and body_start is None:
+                # Handler latency ends when the headers go out; streamed bodies are timed separately
+                body_start = time.perf_counter()
+                record_mgr.tracer.record(_stage(), (body_start - start) * 1000, failed=message["status"] >= 500, path=path)
+            await send(message)
+
+        failed = False
+        try:
+            await self.app(scope, receive, _send)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            now = time.perf_counter()
+            if body_start is None:
+                # A handler that raised never sent a start message and counts as failed
+                record_mgr.tracer.record(_stage(), (now - start) * 1000, failed=True, path=path)
+            else:
+                # Playback, downloads and SSE stream for as long as the client stays, which is not slowness
+                record_mgr.tracer.record(f"{_stage()}.body", (now - body_start) * 1000, failed=failed, slow_log=False, path=path)
+
+
+app.add_middleware(TraceApiHandlers)
+
+
+def _debug_authorized(request: Request) -> bool:
+    if record_mgr is None or not record_mgr.profile_token:
+        return False
+    token = request.headers.get("x-debug-token", "")
+    return hmac.compare_digest(token.encode(), record_mgr.profile_token.encode())
+
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
@@ -118,12 +213,113 @@ async def get_stream_cover_compat(cover_name: str, req: Request):
     return await get_record_cover(cover_name, req)
 
 
+def _cached_json_response(request: Request, body: bytes, etag: str, gzipped: Optional[bytes] = None) -> Response:
+    """Serve a pre-serialized JSON body with ETag/304 and optional gzip."""
+    quoted_etag = f'"{etag}"'
+    headers = {"etag": quoted_etag, "cache-control": "no-cache", "vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if quoted_etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["content-encoding"] = "gzip"
+        body = gzipped if gzipped is not None else gzip.compress(body, GZIP_LEVEL)
+    return Response(body, media_type="application/json", headers=headers)
+
+
 @app.get("/stream/query_record/{stream_name}")
-async def read_stream_name_record_file_list(stream_name: str):
+async def read_stream_name_record_file_list(
+    stream_name: str,
+    request: Request,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = None,
+):
     if record_mgr is None:
         return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
-    record_file_list = await record_mgr.list_records(stream_name)
-    return {"stream_name": stream_name, "files": record_file_list}
+    listing = await record_mgr.listings.get(stream_name)
+    etag = listing.query_etag(since, until, limit, cursor)
+    try:
+        body = listing.query(since, until, limit, cursor)
+    except InvalidCursor:
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    unfiltered = body is listing.full_body
+    return _cached_json_response(request, body, etag, listing.full_gzip() if unfiltered else None)
+
+
+@app.get("/stream/query_records")
+async def read_multi_stream_record_file_list(
+    request: Request,
+    streams: str,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursors: Optional[str] = None,
+):
+    """Bulk listing for a comma separated list of streams; `limit` applies per stream.
+
+    `cursors` is comma separated in the same order as `streams`, each entry being
+    that stream's `next_cursor` from the previous page or empty for its first page.
+    """
+    if record_mgr is None:
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    requested = streams.split(",")
+    cursor_list = cursors.split(",") if cursors else []
+    if len(cursor_list) > len(requested):
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    cursor_list += [""] * (len(requested) - len(cursor_list))
+    stream_cursors: Dict[str, Optional[str]] = {}
+    for name, cursor in zip(requested, cursor_list):
+        if name:
+            stream_cursors.setdefault(name, cursor or None)
+    listings = [await record_mgr.listings.get(name) for name in stream_cursors]
+    try:
+        bodies = [listing.query(since, until, limit, stream_cursors[listing.stream_name]) for listing in listings]
+    except InvalidCursor:
+        return Response(status_code=status.HTTP_400_BAD_REQUEST)
+    body = b'{"streams":[' + b",".join(bodies) + b"]}"
+    etag = hashlib.sha1(
+        "|".join(listing.query_etag(since, until, limit, stream_cursors[listing.stream_name]) for listing in listings).encode()
+    ).hexdigest()
+    return _cached_json_response(request, body, etag)
+
+
+@app.get("/stream/events")
+async def record_events(request: Request, stream: Optional[str] = None):
+    """Server-Sent Events feed of record add/remove events, optionally for one stream."""
+    if record_mgr is None:
+        return Response(status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    async def _event_stream():
+        # Subscribe here, not in the handler: if the client leaves before the body starts, nothing leaks
+        sub = record_mgr.events.subscribe(stream)
+        try:
+            # Events published while this client was away are lost, so every connection starts with a re-list.
+            # Subscribed first: anything after the client's re-list still arrives on this stream.
+            yield "event: resync\ndata: {}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    if sub.overflowed:
+                        break
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+                if sub.closed:
+                    # Server shutting down; the client reconnects once it is back
+                    return
+                yield f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+                if sub.overflowed and sub.queue.empty():
+                    break
+            # Events were dropped, tell the client to re-list before reconnecting
+            yield "event: resync\ndata: {}\n\n"
+        finally:
+            record_mgr.events.unsubscribe(sub)
+
+    headers = {"cache-control": "no-cache", "x-accel-buffering": "no"}
+    return StreamingResponse(_event_stream(), media_type="text/event-stream", headers=headers)
 
 
 @app.get("/stream/record/p/{file_name}")
@@ -144,5 +340,32 @@ async def download_record_file(file_name: str, request: Request):
     return await streaming_response_stream_record(file_name, request)
 
 
+@app.get("/debug/stats")
+async def debug_stats(request: Request):
+    # Hidden unless debug.profile_token is configured and presented in X-Debug-Token
+    if not _debug_authorized(request):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return {
+        "stages": record_mgr.tracer.snapshot(),
+        "loop_lag": record_mgr.loop_monitor.report(),
+        "bandwidth": record_mgr.bandwidth_snapshot(),
+    }
+
+
+@app.get("/debug/profile")
+async def debug_profile(request: Request, seconds: float = 5):
+    """Sample the live event loop for `seconds` and report hot stacks and loop lag."""
+    if not _debug_authorized(request):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    if _profile_lock.locked():
+        return Response(status_code=status.HTTP_409_CONFLICT)
+    async with _profile_lock:
+        started_at = time.time()
+        profile = await sample_event_loop(seconds)
+    profile["loop_lag"] = record_mgr.loop_monitor.report(since=started_at)
+    profile["stages"] = record_mgr.tracer.snapshot()
+    return profile
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=11985)
@@ -0,0 +1,215 @@
+"""Ingest finished recordings left in local_record_dir while on_dvr callbacks were lost.
+
+Run at startup (record.backlog_on_startup) or from the command line:
+    python backlog.py --config config.yaml --concurrency 4
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from RecordFileManager import extract_record_timestamp
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+VALID_MEDIA_SUFFIXES = (".flv", ".mp4")
+DEFAULT_BACKLOG_CONCURRENCY = 2
+DEFAULT_BACKLOG_SETTLE_SECONDS = 60  # files touched more recently may still be handled by on_dvr
+PROGRESS_LOG_INTERVAL = 5
+
+
+class BacklogRecord:
+    __slots__ = ("name", "path", "stream_name", "timestamp", "size", "mtime")
+
+    def __init__(self, name: str, path: str, stream_name: str, timestamp: int, size: int, mtime: float) -> None:
+        self.name = name
+        self.path = path
+        self.stream_name = stream_name
+        self.timestamp = timestamp
+        self.size = size
+        self.mtime = mtime
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+def scan_backlog(
+    path: str,
+    settle_seconds: float = DEFAULT_BACKLOG_SETTLE_SECONDS,
+    only: Optional[Set[str]] = None,
+    recent: Optional[List[str]] = None,
+) -> List[BacklogRecord]:
+    """List finished media files in `path`, oldest first, with a single scandir pass.
+
+    `only` restricts the scan to these file names; names skipped for being
+    modified within `settle_seconds` are appended to `recent`.
+    """
+    records: List[BacklogRecord] = []
+    settled_before = time.time() - settle_seconds
+    skipped_tmp = 0
+    skipped_recent = 0
+    try:
+        it = os.scandir(path)
+    except FileNotFoundError:
+        return records
+    with it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".tmp"):
+                # SRS still writing this segment
+                skipped_tmp += 1
+                continue
+            if not name.lower().endswith(VALID_MEDIA_SUFFIXES):
+                continue
+            if only is not None and name not in only:
+                continue
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime > settled_before:
+                skipped_recent += 1
+                if recent is not None:
+                    recent.append(name)
+                continue
+            records.append(
+                BacklogRecord(
+                    name=name,
+                    path=entry.path,
+                    stream_name=name.split(".")[0],
+                    timestamp=extract_record_timestamp(name),
+                    size=st.st_size,
+                    mtime=st.st_mtime,
+                )
+            )
+    records.sort(key=lambda r: (r.timestamp, r.name))
+    logger.info(
+        "Backlog scan of %s: %d files ready, %d tmp skipped, %d recently modified skipped",
+        path,
+        len(records),
+        skipped_tmp,
+        skipped_recent,
+    )
+    return records
+
+
+async def ingest_backlog(
+    manager: Any,
+    concurrency: int = DEFAULT_BACKLOG_CONCURRENCY,
+    settle_seconds: float = DEFAULT_BACKLOG_SETTLE_SECONDS,
+    only: Optional[Set[str]] = None,
+    recent: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Push backlog files through manager.handle_record_file with bounded parallelism."""
+    records = await asyncio.to_thread(scan_backlog, manager.local_record_dir, settle_seconds, only, recent)
+    total_files = len(records)
+    total_bytes = sum(r.size for r in records)
+    done_files = 0
+    done_bytes = 0
+    failed = 0
+    start = time.monotonic()
+    last_log = start
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    def _log_progress() -> None:
+        elapsed = max(time.monotonic() - start, 1e-6)
+        logger.info(
+            "Backlog progress %d/%d files, %.1f/%.1f MB, %.2f MB/s, %d failed",
+            done_files,
+            total_files,
+            done_bytes / 1024 / 1024,
+            total_bytes / 1024 / 1024,
+            done_bytes / 1024 / 1024 / elapsed,
+            failed,
+        )
+
+    async def _ingest(record: BacklogRecord) -> None:
+        nonlocal done_files, done_bytes, failed, last_log
+        async with semaphore:
+            try:
+                await manager.handle_record_file(
+                    stream_name=record.stream_name,
+                    file_name=record.name,
+                    incoming_path=record.path,
+                    enable_record=True,
+                )
+                done_bytes += record.size
+            except Exception as e:
+                failed += 1
+                logger.error("Backlog ingest of %s failed: %s", record.name, e)
+            done_files += 1
+            if time.monotonic() - last_log >= PROGRESS_LOG_INTERVAL:
+                last_log = time.monotonic()
+                _log_progress()
+
+    if total_files:
+        logger.info("Ingesting backlog of %d files (%.1f MB), concurrency=%d", total_files, total_bytes / 1024 / 1024, concurrency)
+        await asyncio.gather(*(_ingest(r) for r in records))
+        _log_progress()
+    elapsed = time.monotonic() - start
+    return {
+        "files": total_files,
+        "failed": failed,
+        "bytes": done_bytes,
+        "seconds": round(elapsed, 3),
+        "mb_per_second": round(done_bytes / 1024 / 1024 / elapsed, 3) if elapsed > 0 else 0.0,
+    }
+
+
+async def ingest_backlog_on_startup(
+    manager: Any, concurrency: int = DEFAULT_BACKLOG_CONCURRENCY, settle_seconds: float = DEFAULT_BACKLOG_SETTLE_SECONDS
+) -> None:
+    """Startup ingest plus one later pass over files that were too fresh to take at boot.
+
+    Segments finished just before a restart lost their on_dvr callback too, but at
+    boot they look like files a callback may still be handling. Once they have
+    settled and are still there, nobody else is going to upload them.
+    """
+    recent: List[str] = []
+    await ingest_backlog(manager, concurrency, settle_seconds, recent=recent)
+    if not recent:
+        return
+    logger.info("Re-checking %d recently modified backlog files in %.0f s", len(recent), settle_seconds)
+    await asyncio.sleep(settle_seconds)
+    # Only the files seen at boot; anything newer was written while we were up and has its callback
+    await ingest_backlog(manager, concurrency, settle_seconds, only=set(recent))
+
+
+async def _run_cli(args: argparse.Namespace) -> None:
+    from webdav_record_manager import WebDavRecordManager
+
+    manager = WebDavRecordManager(args.config)
+    if args.dry_run:
+        for record in scan_backlog(manager.local_record_dir, args.settle_seconds):
+            print(f"{record.name}\t{record.size}")
+        return
+    await manager.init()
+    try:
+        result = await ingest_backlog(manager, args.concurrency, args.settle_seconds)
+        # close() cancels the janitor mid-debounce, so evict for the final burst here
+        if manager.is_leader:
+            await manager._limit_storage_size()
+        else:
+            manager._touch_cleanup_request()
+    finally:
+        await manager.close()
+    logger.info("Backlog ingest finished: %s", result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", default="config.yaml")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_BACKLOG_CONCURRENCY)
+    parser.add_argument("--settle-seconds", type=float, default=DEFAULT_BACKLOG_SETTLE_SECONDS)
+    parser.add_argument("--dry-run", action="store_true", help="only list the files that would be ingested")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="[%(levelname)s] %(asctime)s [%(name)s:%(lineno)d]:%(message)s")
+    asyncio.run(_run_cli(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+ADJUST_INTERVAL = 0.5  # seconds between ingest budget recalculations
+DEMAND_SMOOTHING = 0.5  # EWMA weight of the newest playback throughput sample
+LINK_HEADROOM = 1.2  # reserve 20% above measured playback demand
+MIN_LINK_SHARE = 0.05  # ingest never drops below 5% of the link (or its own budget) without an explicit floor
+BURST_SECONDS = 0.25  # bucket depth, in seconds of traffic at the configured rate
+SHARED_STATE_STALE = 3  # seconds after which a worker's published state is ignored
+
+
+class TokenBucket:
+    """Byte-rate limiter; rate 0 means unlimited.
+
+    Callers may take more than the bucket holds: the bucket goes into debt and
+    the caller sleeps until it is repaid, so large chunks are still paced.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = float(rate)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+
+    @property
+    def _capacity(self) -> float:
+        return self.rate * BURST_SECONDS
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate: float) -> None:
+        if rate == self.rate:
+            return
+        self._refill()
+        self.rate = float(rate)
+        self._tokens = min(self._tokens, self._capacity)
+
+    async def acquire(self, nbytes: int) -> None:
+        if self.rate <= 0:
+            return
+        self._refill()
+        self._tokens -= nbytes
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+class SharedBandwidthState:
+    """Shaper state of every worker on the host, one small JSON file per worker."""
+
+    def __init__(self, state_dir: str) -> None:
+        self.state_dir = state_dir
+        os.makedirs(self.state_dir, exist_ok=True)
+        self._path = os.path.join(self.state_dir, f"{os.getpid()}.json")
+
+    def exchange(self, local: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Publish this worker's state and return the fresh states of the other workers."""
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(local, f)
+        os.replace(tmp_path, self._path)
+        peers: List[Dict[str, Any]] = []
+        # Files of exited workers simply stop being refreshed
+        fresh_after = time.time() - SHARED_STATE_STALE
+        with os.scandir(self.state_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".json") or entry.path == self._path:
+                    continue
+                try:
+                    if entry.stat().st_mtime < fresh_after:
+                        continue
+                    with open(entry.path, "r") as f:
+                        peers.append(json.load(f))
+                except (FileNotFoundError, ValueError):
+                    continue
+        return peers
+
+    def remove(self) -> None:
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+
+
+class BandwidthShaper:
+    """Separate ingest and playback budgets; playback has priority.
+
+    Playback is only limited by its own budget. Ingest runs at its budget while
+    nobody is watching and backs off as playback demand grows: it gets whatever
+    measured playback leaves free of the link capacity, or of its own budget when
+    no link capacity is known. An unlimited ingest budget can only drop to its
+    explicit floor while any playback is active.
+
+    With `state_dir` the budgets are host-wide: workers exchange their playback
+    demand through it, ingesting workers split the ingest budget and each worker
+    gets the share of the playback budget matching its share of active playbacks.
+    Without it every worker applies the full budgets on its own.
+    """
+
+    def __init__(
+        self,
+        ingest_rate: float = 0,
+        playback_rate: float = 0,
+        ingest_min_rate: float = 0,
+        link_rate: float = 0,
+        state_dir: Optional[str] = None,
+    ) -> None:
+        self.ingest_rate = float(ingest_rate)
+        self.playback_rate = float(playback_rate)
+        self.ingest_min_rate = float(ingest_min_rate)
+        self.link_rate = float(link_rate)
+        self._ingest = TokenBucket(ingest_rate)
+        self._playback = TokenBucket(playback_rate)
+        self._shared = SharedBandwidthState(state_dir) if state_dir else None
+        self.active_playbacks = 0
+        self.playback_demand = 0.0  # smoothed bytes/s
+        self.host_active_playbacks = 0
+        self.host_playback_demand = 0.0
+        self.ingest_workers = 1
+        self._playback_bytes = 0
+        self._ingest_bytes = 0
+        self._window_start = time.monotonic()
+
+    def playback_started(self) -> None:
+        self.active_playbacks += 1
+
+    def playback_finished(self) -> None:
+        self.active_playbacks = max(0, self.active_playbacks - 1)
+
+    async def _adjust(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < ADJUST_INTERVAL:
+            return
+        sample = self._playback_bytes / elapsed
+        self.playback_demand = DEMAND_SMOOTHING * sample + (1 - DEMAND_SMOOTHING) * self.playback_demand
+        ingesting = self._ingest_bytes > 0
+        self._playback_bytes = 0
+        self._ingest_bytes = 0
+        # Reset before awaiting so concurrent callers skip this window
+        self._window_start = now
+        demand = self.playback_demand
+        active = self.active_playbacks
+        ingest_workers = 1
+        if self._shared is not None:
+            local = {"active_playbacks": self.active_playbacks, "playback_demand": self.playback_demand, "ingesting": ingesting}
+            try:
+                peers = await asyncio.to_thread(self._shared.exchange, local)
+            except OSError as e:
+                logger.warning("Exchange bandwidth state failed: %s", e)
+                peers = []
+            demand += sum(float(p.get("playback_demand", 0)) for p in peers)
+            active += sum(int(p.get("active_playbacks", 0)) for p in peers)
+            ingest_workers += sum(1 for p in peers if p.get("ingesting"))
+        self.host_playback_demand = demand
+        self.host_active_playbacks = active
+        self.ingest_workers = ingest_workers
+        if self.link_rate > 0:
+            ceiling = self.ingest_rate if self.ingest_rate > 0 else self.link_rate
+            floor = self.ingest_min_rate if self.ingest_min_rate > 0 else self.link_rate * MIN_LINK_SHARE
+            target = max(floor, min(ceiling, self.link_rate - demand * LINK_HEADROOM))
+        elif self.ingest_rate > 0:
+            floor = self.ingest_min_rate if self.ingest_min_rate > 0 else self.ingest_rate * MIN_LINK_SHARE
+            target = max(min(floor, self.ingest_rate), self.ingest_rate - demand * LINK_HEADROOM)
+        elif active > 0 and self.ingest_min_rate > 0:
+            target = self.ingest_min_rate
+        else:
+            target = self.ingest_rate
+        # Workers uploading at the same time share the host budget equally
+        target /= ingest_workers
+        if target != self._ingest.rate:
+            logger.debug(
+                "Ingest budget %.0f B/s (host playback demand %.0f B/s, %d active, %d ingesting workers)",
+                target,
+                demand,
+                active,
+                ingest_workers,
+            )
+        self._ingest.set_rate(target)
+        if self.playback_rate > 0 and self.active_playbacks > 0 and active > 0:
+            # Rate 0 would mean unlimited, so a worker without playbacks keeps the full budget until it gets one
+            self._playback.set_rate(self.playback_rate * self.active_playbacks / active)
+
+    async def acquire_ingest(self, nbytes: int) -> None:
+        self._ingest_bytes += nbytes
+        await self._adjust()
+        await self._ingest.acquire(nbytes)
+
+    async def acquire_playback(self, nbytes: int) -> None:
+        self._playback_bytes += nbytes
+        # Playback-only workers must publish their demand too
+        await self._adjust()
+        await self._playback.acquire(nbytes)
+
+    def close(self) -> None:
+        if self._shared is not None:
+            self._shared.remove()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ingest_rate": self._ingest.rate,
+            "playback_rate": self._playback.rate,
+            "playback_demand": round(self.playback_demand, 1),
+            "active_playbacks": self.active_playbacks,
+            "host_playback_demand": round(self.host_playback_demand, 1),
+            "host_active_playbacks": self.host_active_playbacks,
+            "ingest_workers": self.ingest_workers,
+        }
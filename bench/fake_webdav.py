@@ -0,0 +1,195 @@
+"""In-process WebDAV stand-in used by the benchmark suite.
+
+Implements just enough of WebDAV (PROPFIND, GET/HEAD with Range, PUT, DELETE,
+MKCOL) for WebDavClient, with configurable per-request latency and bandwidth.
+"""
+import asyncio
+import email.utils
+import time
+import urllib.parse
+from typing import Dict, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from aiohttp import web
+
+CHUNK_SIZE = 256 * 1024
+
+
+class FakeFile:
+    def __init__(self, size: int, data: Optional[bytes] = None, mtime: Optional[float] = None) -> None:
+        # data=None means a synthetic file whose content is generated on read
+        self.size = size
+        self.data = data
+        self.mtime = mtime if mtime is not None else time.time()
+
+    def read(self, start: int, end: int) -> bytes:
+        if self.data is not None:
+            return self.data[start:end]
+        return bytes(end - start)
+
+
+class FakeWebDavServer:
+    def __init__(self, latency: float = 0.0, bandwidth: int = 0, root: str = "/dav") -> None:
+        self.latency = latency
+        self.bandwidth = bandwidth  # bytes per second per connection, 0 = unlimited
+        self.root = "/" + root.strip("/")
+        self.files: Dict[str, FakeFile] = {}
+        self.dirs = {""}
+        self.request_count: Dict[str, int] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application(client_max_size=0)
+        app.router.add_route("*", "/{path:.*}", self._dispatch)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        sockets = site._server.sockets  # type: ignore[union-attr]
+        bound_port = sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def add_file(self, path: str, size: int, data: Optional[bytes] = None, mtime: Optional[float] = None) -> None:
+        path = path.strip("/")
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        self.dirs.add(parent)
+        self.files[path] = FakeFile(size, data, mtime)
+
+    def clear(self) -> None:
+        self.files.clear()
+        self.dirs = {""}
+
+    def _relative(self, request: web.Request) -> str:
+        path = urllib.parse.unquote(request.path)
+        if path.startswith(self.root):
+            path = path[len(self.root):]
+        return path.strip("/")
+
+    async def _throttle(self, nbytes: int) -> None:
+        if self.bandwidth > 0:
+            await asyncio.sleep(nbytes / self.bandwidth)
+
+    async def _dispatch(self, request: web.Request) -> web.StreamResponse:
+        self.request_count[request.method] = self.request_count.get(request.method, 0) + 1
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        handler = getattr(self, f"_handle_{request.method.lower()}", None)
+        if handler is None:
+            return web.Response(status=405)
+        return await handler(request, self._relative(request))
+
+    async def _handle_mkcol(self, request: web.Request, path: str) -> web.StreamResponse:
+        if path in self.dirs:
+            return web.Response(status=405)
+        self.dirs.add(path)
+        return web.Response(status=201)
+
+    async def _handle_head(self, request: web.Request, path: str) -> web.StreamResponse:
+        if path in self.dirs:
+            return web.Response(status=200)
+        fake = self.files.get(path)
+        if fake is None:
+            return web.Response(status=404)
+        return web.Response(status=200, headers={"Content-Length": str(fake.size)})
+
+    async def _handle_delete(self, request: web.Request, path: str) -> web.StreamResponse:
+        if self.files.pop(path, None) is None:
+            return web.Response(status=404)
+        return web.Response(status=204)
+
+    async def _handle_put(self, request: web.Request, path: str) -> web.StreamResponse:
+        parent = path.rsplit("/", 1)[0] if "/" in path else ""
+        if parent not in self.dirs:
+            return web.Response(status=409)
+        size = 0
+        async for chunk in request.content.iter_chunked(CHUNK_SIZE):
+            size += len(chunk)
+            await self._throttle(len(chunk))
+        # Uploaded content is discarded; only the size is kept
+        self.add_file(path, size)
+        return web.Response(status=201)
+
+    def _parse_range(self, header: str, size: int) -> Optional[Tuple[int, int]]:
+        if not header.startswith("bytes="):
+            return None
+        start_text, _, end_text = header[len("bytes="):].split(",")[0].partition("-")
+        if start_text == "":
+            start = max(0, size - int(end_text))
+            end = size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+        if start >= size:
+            return None
+        return start, min(end, size - 1)
+
+    async def _handle_get(self, request: web.Request, path: str) -> web.StreamResponse:
+        fake = self.files.get(path)
+        if fake is None:
+            return web.Response(status=404)
+        start, end = 0, fake.size - 1
+        status = 200
+        headers = {"Accept-Ranges": "bytes", "Content-Type": "application/octet-stream"}
+        range_header = request.headers.get("Range")
+        if range_header:
+            parsed = self._parse_range(range_header, fake.size)
+            if parsed is None:
+                return web.Response(status=416)
+            start, end = parsed
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{fake.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        resp = web.StreamResponse(status=status, headers=headers)
+        await resp.prepare(request)
+        offset = start
+        while offset <= end:
+            chunk_end = min(offset + CHUNK_SIZE, end + 1)
+            await self._throttle(chunk_end - offset)
+            await resp.write(fake.read(offset, chunk_end))
+            offset = chunk_end
+        await resp.write_eof()
+        return resp
+
+    def _propfind_entry(self, href: str, is_dir: bool, size: int, mtime: float) -> str:
+        resource_type = "<d:collection/>" if is_dir else ""
+        return (
+            "<d:response>"
+            f"<d:href>{escape(urllib.parse.quote(href))}</d:href>"
+            "<d:propstat><d:prop>"
+            f"<d:getcontentlength>{size}</d:getcontentlength>"
+            f"<d:getlastmodified>{email.utils.formatdate(mtime, usegmt=True)}</d:getlastmodified>"
+            f"<d:resourcetype>{resource_type}</d:resourcetype>"
+            "</d:prop><d:status>HTTP/1.1 200 OK</d:status></d:propstat>"
+            "</d:response>"
+        )
+
+    async def _handle_propfind(self, request: web.Request, path: str) -> web.StreamResponse:
+        await request.read()
+        depth = request.headers.get("Depth", "1")
+        parts = []
+        if path in self.dirs:
+            base_href = f"{self.root}/{path}/" if path else f"{self.root}/"
+            parts.append(self._propfind_entry(base_href, True, 0, time.time()))
+            if depth != "0":
+                prefix = f"{path}/" if path else ""
+                for name, fake in self.files.items():
+                    if name.startswith(prefix) and "/" not in name[len(prefix):]:
+                        parts.append(self._propfind_entry(f"{self.root}/{name}", False, fake.size, fake.mtime))
+                for d in self.dirs:
+                    if d and d.startswith(prefix) and "/" not in d[len(prefix):]:
+                        parts.append(self._propfind_entry(f"{self.root}/{d}/", True, 0, time.time()))
+        elif path in self.files:
+            fake = self.files[path]
+            parts.append(self._propfind_entry(f"{self.root}/{path}", False, fake.size, fake.mtime))
+        else:
+            return web.Response(status=404)
+        body = '<?xml version="1.0" encoding="utf-8"?><d:multistatus xmlns:d="DAV:">' + "".join(parts) + "</d:multistatus>"
+        await self._throttle(len(body))
+        return web.Response(status=207, body=body.encode(), content_type="application/xml")
@@ -0,0 +1,417 @@
+"""Benchmark suite for the DVR manager against an in-process fake WebDAV server.
+
+Usage:
+    python bench/run_bench.py --output bench_output.json
+    python bench/run_bench.py --quick --compare old.json
+
+Every scenario reports plain numbers so two JSON files from different commits
+can be diffed with --compare.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_webdav import FakeWebDavServer  # noqa: E402
+from webdav_record_manager import WebDavRecordManager  # noqa: E402
+
+MB = 1024 * 1024
+STREAM_NAME = "bench"
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def _pick(ratio: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(_pick(0.5) * 1000, 3),
+        "p95_ms": round(_pick(0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def _timed(fn: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await fn()
+    return time.perf_counter() - start
+
+
+def _record_name(index: int) -> str:
+    return f"{STREAM_NAME}.{1700000000000 + index * 1000}.flv"
+
+
+def _write_local_file(path: str, size: int) -> None:
+    block = os.urandom(min(size, MB))
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            n = min(len(block), size - written)
+            f.write(block[:n])
+            written += n
+
+
+class BenchContext:
+    def __init__(self, args: argparse.Namespace, workdir: str) -> None:
+        self.args = args
+        self.workdir = workdir
+        self.server = FakeWebDavServer(latency=args.latency_ms / 1000, bandwidth=args.bandwidth_mbps * MB)
+        self.manager: WebDavRecordManager
+
+    async def start(self) -> None:
+        url = await self.server.start()
+        config = {
+            "webdav": {
+                "hostname": url,
+                "login": "bench",
+                "password": "bench",
+                "root": self.server.root,
+                "max_storage_bytes": 1 << 50,
+            },
+            "record": {
+                "local_dir": os.path.join(self.workdir, "live"),
+                "cover_dir": os.path.join(self.workdir, "live", "cover"),
+                "cover_remote_dir": "cover",
+            },
+            "debug": {"slow_threshold_ms": 0, "loop_lag_interval": 0},
+        }
+        os.makedirs(config["record"]["local_dir"], exist_ok=True)
+        config_path = os.path.join(self.workdir, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.safe_dump(config, f)
+        self.manager = WebDavRecordManager(config_path)
+        await self.manager.init()
+
+    async def stop(self) -> None:
+        await self.manager.close()
+        await self.server.stop()
+
+
+async def bench_listing(ctx: BenchContext) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for entry_count in ctx.args.list_sizes:
+        ctx.server.clear()
+        for i in range(entry_count):
+            ctx.server.add_file(_record_name(i), 100 * MB)
+        samples = [await _timed(lambda: ctx.manager.list_records(STREAM_NAME)) for _ in range(ctx.args.iterations)]
+
+        async def _cached_page() -> bytes:
+            listing = await ctx.manager.listings.get(STREAM_NAME)
+            return listing.query(limit=100)
+
+        ctx.manager.listings.invalidate()
+        cached = [await _timed(_cached_page) for _ in range(ctx.args.iterations)]
+        results[str(entry_count)] = {"uncached": _percentiles(samples), "cached_page": _percentiles(cached)}
+    return results
+
+
+async def bench_proxy(ctx: BenchContext) -> Dict[str, Any]:
+    ctx.server.clear()
+    size = ctx.args.proxy_mb * MB
+    name = _record_name(0)
+    ctx.server.add_file(name, size)
+
+    async def _drain(range_header: Any = None) -> int:
+        _, _, body = await ctx.manager.stream_record(name, range_header)
+        total = 0
+        async for chunk in body:
+            total += len(chunk)
+        return total
+
+    start = time.perf_counter()
+    total = await _drain()
+    elapsed = time.perf_counter() - start
+
+    seek_samples: List[float] = []
+    rng = random.Random(0)
+    for _ in range(ctx.args.iterations):
+        offset = rng.randrange(0, size - MB)
+        t0 = time.perf_counter()
+        _, _, body = await ctx.manager.stream_record(name, f"bytes={offset}-")
+        async for _chunk in body:
+            break
+        seek_samples.append(time.perf_counter() - t0)
+        await body.aclose()
+    return {
+        "bytes": total,
+        "throughput_mb_s": round(total / MB / elapsed, 3),
+        "seek_first_byte": _percentiles(seek_samples),
+    }
+
+
+async def bench_upload(ctx: BenchContext) -> Dict[str, Any]:
+    ctx.server.clear()
+    size = ctx.args.upload_mb * MB
+    local_path = os.path.join(ctx.workdir, "upload.flv")
+    _write_local_file(local_path, size)
+    try:
+        elapsed = await _timed(lambda: ctx.manager._client.upload_file(local_path, _record_name(0)))
+    finally:
+        os.remove(local_path)
+    return {"bytes": size, "seconds": round(elapsed, 3), "throughput_mb_s": round(size / MB / elapsed, 3)}
+
+
+async def bench_cover(ctx: BenchContext) -> Dict[str, Any]:
+    ctx.server.clear()
+    cover_count = 50
+    for i in range(cover_count):
+        ctx.server.add_file(f"cover/{_record_name(i)[:-4]}.jpg", 64 * 1024, data=os.urandom(64 * 1024))
+    concurrency = ctx.args.concurrency
+    total = ctx.args.cover_requests
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(_record_name(i % cover_count))
+    latencies: List[float] = []
+    failures = 0
+
+    async def _worker() -> None:
+        nonlocal failures
+        while not queue.empty():
+            name = queue.get_nowait()
+            t0 = time.perf_counter()
+            data = await ctx.manager.fetch_cover(name)
+            latencies.append(time.perf_counter() - t0)
+            if data is None:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "failures": failures,
+        "rps": round(total / elapsed, 3),
+        "latency": _percentiles(latencies),
+    }
+
+
+async def bench_stream_cover(ctx: BenchContext) -> Dict[str, Any]:
+    """Live covers through get_stream_cover, with ffmpeg replaced by a fixed-latency stub."""
+    manager = ctx.manager
+    stream_count = 8
+    streams = [f"live{i}" for i in range(stream_count)]
+    generations = 0
+    cover_bytes = os.urandom(64 * 1024)
+
+    async def _fake_ffmpeg(stream_name: str, timeout: float) -> bytes:
+        nonlocal generations
+        generations += 1
+        await asyncio.sleep(ctx.args.cover_gen_ms / 1000)
+        return cover_bytes
+
+    manager._generate_stream_cover = _fake_ffmpeg  # type: ignore[method-assign]
+    try:
+        # Cold: every stream misses both caches at once, generation must be coalesced
+        manager._stream_cover_cache.clear()
+        for name in os.listdir(manager._shared_covers.cache_dir):
+            os.remove(os.path.join(manager._shared_covers.cache_dir, name))
+        requests = [streams[i % stream_count] for i in range(ctx.args.concurrency * stream_count)]
+        start = time.perf_counter()
+        cold = await asyncio.gather(*(_timed(lambda s=s: manager.get_stream_cover(s)) for s in requests))
+        cold_elapsed = time.perf_counter() - start
+        cold_generations = generations
+
+        # Warm: served from the in-process cache
+        queue: asyncio.Queue = asyncio.Queue()
+        for i in range(ctx.args.cover_requests):
+            queue.put_nowait(streams[i % stream_count])
+        warm: List[float] = []
+
+        async def _worker() -> None:
+            while not queue.empty():
+                stream_name = queue.get_nowait()
+                warm.append(await _timed(lambda: manager.get_stream_cover(stream_name)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(ctx.args.concurrency)))
+        warm_elapsed = time.perf_counter() - start
+    finally:
+        del manager._generate_stream_cover
+    return {
+        "streams": stream_count,
+        "generate_ms": ctx.args.cover_gen_ms,
+        "cold": {
+            "requests": len(requests),
+            "generations": cold_generations,
+            "seconds": round(cold_elapsed, 3),
+            "latency": _percentiles(list(cold)),
+        },
+        "warm": {
+            "requests": len(warm),
+            "generations": generations - cold_generations,
+            "rps": round(len(warm) / warm_elapsed, 3),
+            "latency": _percentiles(warm),
+        },
+    }
+
+
+async def bench_dvr_burst(ctx: BenchContext) -> Dict[str, Any]:
+    """on_dvr callbacks for a burst of segments, with ffmpeg replaced by a fixed-latency stub."""
+    ctx.server.clear()
+    manager = ctx.manager
+    local_dir = manager.local_record_dir
+    names = [_record_name(i) for i in range(ctx.args.burst)]
+    for name in names:
+        _write_local_file(os.path.join(local_dir, name), ctx.args.burst_mb * MB)
+    per_call: List[float] = []
+    cover_bytes = os.urandom(64 * 1024)
+
+    # Random segments are not decodable, so real ffmpeg would always fail and skip the cover upload
+    async def _fake_ffmpeg(local_file_path: str, file_name: str) -> str:
+        await asyncio.sleep(ctx.args.cover_gen_ms / 1000)
+        os.makedirs(manager.local_cover_dir, exist_ok=True)
+        cover_output = os.path.join(manager.local_cover_dir, manager._cover_name(file_name))
+        with open(cover_output, "wb") as f:
+            f.write(cover_bytes)
+        return cover_output
+
+    async def _one(name: str) -> None:
+        t0 = time.perf_counter()
+        await manager.handle_record_file(STREAM_NAME, name, os.path.join(local_dir, name), True)
+        per_call.append(time.perf_counter() - t0)
+
+    manager._generate_cover = _fake_ffmpeg  # type: ignore[method-assign]
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(_one(name) for name in names))
+        elapsed = time.perf_counter() - start
+    finally:
+        del manager._generate_cover
+    return {
+        "segments": len(names),
+        "segment_mb": ctx.args.burst_mb,
+        "seconds": round(elapsed, 3),
+        "segments_per_s": round(len(names) / elapsed, 3),
+        "callback": _percentiles(per_call),
+        "webdav_requests": dict(ctx.server.request_count),
+    }
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext], Awaitable[Dict[str, Any]]]] = {
+    "listing": bench_listing,
+    "proxy": bench_proxy,
+    "upload": bench_upload,
+    "cover": bench_cover,
+    "stream_cover": bench_stream_cover,
+    "dvr_burst": bench_dvr_burst,
+}
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, float]) -> None:
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _flatten(f"{prefix}.{k}" if prefix else k, v, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = float(value)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    old_flat: Dict[str, float] = {}
+    new_flat: Dict[str, float] = {}
+    _flatten("", old.get("results", {}), old_flat)
+    _flatten("", new.get("results", {}), new_flat)
+    lines = []
+    for key in sorted(set(old_flat) & set(new_flat)):
+        before, after = old_flat[key], new_flat[key]
+        change = (after - before) / before * 100 if before else 0.0
+        lines.append(f"{key:60s} {before:14.3f} -> {after:14.3f} ({change:+.1f}%)")
+    return lines
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="dvr_bench_") as workdir:
+        ctx = BenchContext(args, workdir)
+        await ctx.start()
+        try:
+            for name in args.scenarios:
+                ctx.server.request_count.clear()
+                logging.getLogger("bench").info("running %s", name)
+                results[name] = await SCENARIOS[name](ctx)
+        finally:
+            await ctx.stop()
+    return {
+        "meta": {
+            "revision": _git_revision(),
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake server latency per request")
+    parser.add_argument("--bandwidth-mbps", type=int, default=0, help="fake server MB/s per connection, 0 = unlimited")
+    parser.add_argument("--list-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--proxy-mb", type=int, default=256)
+    parser.add_argument("--upload-mb", type=int, default=512)
+    parser.add_argument("--cover-requests", type=int, default=2000)
+    parser.add_argument("--cover-gen-ms", type=float, default=200.0, help="simulated ffmpeg time per cover")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--burst", type=int, default=16, help="segments in the on_dvr burst")
+    parser.add_argument("--burst-mb", type=int, default=16)
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--output", help="write JSON result to this file instead of stdout")
+    parser.add_argument("--compare", help="previous JSON result to diff against")
+    args = parser.parse_args()
+    if args.quick:
+        args.list_sizes = [100, 1000]
+        args.iterations = 5
+        args.proxy_mb = 32
+        args.upload_mb = 32
+        args.cover_requests = 200
+        args.burst = 4
+        args.burst_mb = 4
+    return args
+
+
+def main() -> None:
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING, format="[%(levelname)s] %(asctime)s [%(name)s]:%(message)s")
+    logging.getLogger("bench").setLevel(logging.INFO)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+        for line in compare(previous, report):
+            print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
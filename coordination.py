@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+LOCK_POLL_INTERVAL = 0.05
+LEADER_RETRY_INTERVAL = 5
+
+
+def _safe_key(key: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in key)
+
+
+class FileLock:
+    """Cross-process exclusive lock on a file, acquired without blocking the event loop.
+
+    Falls back to an always-granted lock where fcntl is unavailable, which keeps
+    single-worker deployments on such platforms working as before.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        if fcntl is None:
+            self._fd = -1
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    async def acquire(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+        return True
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        if self._fd >= 0:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+        self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        return self._fd is not None
+
+
+class LeaderElection:
+    """Elect one worker as leader by holding a lock file for the life of the process."""
+
+    def __init__(self, lock_path: str) -> None:
+        self._lock = FileLock(lock_path)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock.locked
+
+    def start(self) -> None:
+        if self._lock.try_acquire():
+            logger.info("Worker %d elected leader", os.getpid())
+            return
+        # Keep retrying so a new leader takes over when the current one exits
+        self._task = asyncio.create_task(self._retry())
+
+    async def _retry(self) -> None:
+        while not self._lock.try_acquire():
+            await asyncio.sleep(LEADER_RETRY_INTERVAL)
+        logger.info("Worker %d took over as leader", os.getpid())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._lock.release()
+
+
+class SharedCoverCache:
+    """File-backed stream cover cache shared by all workers on the host."""
+
+    def __init__(self, cache_dir: str, ttl: float) -> None:
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, stream_name: str) -> str:
+        return os.path.join(self.cache_dir, f"{_safe_key(stream_name)}.jpg")
+
+    def lock(self, stream_name: str) -> FileLock:
+        return FileLock(os.path.join(self.cache_dir, f"{_safe_key(stream_name)}.lock"))
+
+    def _read(self, stream_name: str) -> Optional[Tuple[float, bytes]]:
+        path = self._path(stream_name)
+        try:
+            mtime = os.stat(path).st_mtime
+            if time.time() - mtime >= self.ttl:
+                return None
+            with open(path, "rb") as f:
+                return mtime, f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, stream_name: str, cover_bytes: bytes) -> None:
+        path = self._path(stream_name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(cover_bytes)
+        # Atomic rename so readers never see a partially written cover
+        os.replace(tmp_path, path)
+
+    async def get(self, stream_name: str) -> Optional[Tuple[float, bytes]]:
+        try:
+            return await asyncio.to_thread(self._read, stream_name)
+        except Exception as e:
+            logger.warning("Read shared cover cache for %s failed: %s", stream_name, e)
+            return None
+
+    async def put(self, stream_name: str, cover_bytes: bytes) -> None:
+        try:
+            await asyncio.to_thread(self._write, stream_name, cover_bytes)
+        except Exception as e:
+            logger.warning("Write shared cover cache for %s failed: %s", stream_name, e)
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+SUBSCRIBER_QUEUE_SIZE = 256
+RELAY_MAX_DATAGRAM = 64 * 1024
+
+
+class RecordEventSubscription:
+    def __init__(self, stream_name: Optional[str]) -> None:
+        self.stream_name = stream_name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        # Set when events were dropped; the client must re-list to resync
+        self.overflowed = False
+        # Set on server shutdown; the consumer should end its stream
+        self.closed = False
+
+    def wants(self, event: Dict[str, Any]) -> bool:
+        return self.stream_name is None or event.get("stream_name") == self.stream_name
+
+
+class _RelayProtocol(asyncio.DatagramProtocol):
+    def __init__(self, bus: "RecordEventBus") -> None:
+        self._bus = bus
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        try:
+            event = json.loads(data)
+        except ValueError:
+            logger.warning("Drop malformed record event from relay")
+            return
+        self._bus._dispatch(event)
+
+
+class RecordEventBus:
+    """Fan out record add/remove events to subscribers in every worker.
+
+    Each worker binds a unix datagram socket in `relay_dir`; publishing delivers
+    locally and sends one datagram to every other worker's socket. Without
+    unix sockets the bus only reaches subscribers of the publishing process.
+    """
+
+    def __init__(self, relay_dir: Optional[str] = None) -> None:
+        self._subscribers: Set[RecordEventSubscription] = set()
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._relay_dir = relay_dir if hasattr(socket, "AF_UNIX") else None
+        self._socket_path: Optional[str] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[socket.socket] = None
+
+    async def start(self) -> None:
+        if self._relay_dir is None:
+            return
+        os.makedirs(self._relay_dir, exist_ok=True)
+        self._socket_path = os.path.join(self._relay_dir, f"{os.getpid()}.sock")
+        if os.path.exists(self._socket_path):
+            os.remove(self._socket_path)
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _RelayProtocol(self), local_addr=self._socket_path, family=socket.AF_UNIX
+        )
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def stop(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        if self._socket_path is not None:
+            try:
+                os.remove(self._socket_path)
+            except FileNotFoundError:
+                pass
+            self._socket_path = None
+        for sub in list(self._subscribers):
+            self.unsubscribe(sub)
+
+    def subscribe(self, stream_name: Optional[str] = None) -> RecordEventSubscription:
+        sub = RecordEventSubscription(stream_name)
+        self._subscribers.add(sub)
+        return sub
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Call `callback` synchronously for every event, local or relayed."""
+        self._listeners.append(callback)
+
+    def unsubscribe(self, sub: RecordEventSubscription) -> None:
+        self._subscribers.discard(sub)
+
+    def close_subscribers(self) -> None:
+        """Wake every subscriber and mark it closed, so long-lived streams end before shutdown."""
+        for sub in self._subscribers:
+            sub.closed = True
+            try:
+                # Wakes a consumer blocked on get(); a full queue is drained and then sees `closed`
+                sub.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, stream_name: str, record: Dict[str, Any]) -> None:
+        event = {"type": event_type, "stream_name": stream_name, "record": record}
+        self._dispatch(event)
+        self._relay(event)
+
+    def _dispatch(self, event: Dict[str, Any]) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Record event listener failed")
+        for sub in self._subscribers:
+            if not sub.wants(event) or sub.overflowed:
+                continue
+            try:
+                sub.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                sub.overflowed = True
+                logger.warning("Record event subscriber for %s overflowed", sub.stream_name or "*")
+
+    def _peer_sockets(self) -> List[str]:
+        if self._relay_dir is None:
+            return []
+        try:
+            with os.scandir(self._relay_dir) as it:
+                return [e.path for e in it if e.name.endswith(".sock") and e.path != self._socket_path]
+        except FileNotFoundError:
+            return []
+
+    def _relay(self, event: Dict[str, Any]) -> None:
+        if self._sender is None:
+            return
+        data = json.dumps(event, separators=(",", ":")).encode()
+        if len(data) > RELAY_MAX_DATAGRAM:
+            logger.warning("Record event too large to relay: %d bytes", len(data))
+            return
+        for path in self._peer_sockets():
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Socket left behind by a worker that exited
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                logger.warning("Record event relay to %s is backed up, event dropped", path)
+            except OSError as e:
+                logger.warning("Record event relay to %s failed: %s", path, e)
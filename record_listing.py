@@ -0,0 +1,153 @@
+import asyncio
+import base64
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from RecordFileManager import RecordFileBaseModel
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+DEFAULT_LISTING_TTL = 60  # safety net for changes made outside this service
+GZIP_MIN_SIZE = 1024
+GZIP_LEVEL = 5
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp: int, file_name: str) -> str:
+    raw = json.dumps([timestamp, file_name], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, file_name = json.loads(raw)
+        return int(timestamp), str(file_name)
+    except Exception as e:
+        raise InvalidCursor(cursor) from e
+
+
+def listing_signature(records: List[RecordFileBaseModel]) -> FrozenSet[Tuple[str, int]]:
+    """What a listing is built from; equal signatures render identical bodies."""
+    return frozenset((r.file_name, r.file_size) for r in records)
+
+
+class StreamListing:
+    """Pre-serialized records of one stream, sorted by (timestamp, file_name)."""
+
+    def __init__(self, stream_name: str, records: List[RecordFileBaseModel]) -> None:
+        self.stream_name = stream_name
+        self.signature = listing_signature(records)
+        records = sorted(records, key=lambda r: (r.timestamp, r.file_name))
+        self.keys: List[Tuple[int, str]] = [(r.timestamp, r.file_name) for r in records]
+        self.items: List[bytes] = [json.dumps(r.model_dump(), separators=(",", ":")).encode() for r in records]
+        self.full_body = self._render(self.items, None)
+        self.etag = hashlib.sha1(self.full_body).hexdigest()
+        self._full_gzip: Optional[bytes] = None
+
+    def _render(self, items: List[bytes], next_cursor: Optional[str]) -> bytes:
+        head = json.dumps({"stream_name": self.stream_name, "next_cursor": next_cursor}, separators=(",", ":")).encode()
+        # splice the pre-serialized records into {"stream_name":..,"next_cursor":..,"files":[...]}
+        return head[:-1] + b',"files":[' + b",".join(items) + b"]}"
+
+    def full_gzip(self) -> bytes:
+        if self._full_gzip is None:
+            self._full_gzip = gzip.compress(self.full_body, GZIP_LEVEL)
+        return self._full_gzip
+
+    def query(
+        self,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> bytes:
+        if since is None and until is None and limit is None and cursor is None:
+            return self.full_body
+        lo = 0
+        if cursor is not None:
+            lo = bisect.bisect_right(self.keys, decode_cursor(cursor))
+        if since is not None:
+            lo = max(lo, bisect.bisect_left(self.keys, (since, "")))
+        hi = len(self.keys)
+        if until is not None:
+            # every key with timestamp <= until sorts before (until + 1, "")
+            hi = bisect.bisect_left(self.keys, (until + 1, ""))
+        next_cursor = None
+        if limit is not None and hi - lo > limit:
+            hi = lo + max(0, limit)
+            if hi > lo:
+                next_cursor = encode_cursor(*self.keys[hi - 1])
+        return self._render(self.items[lo:hi], next_cursor)
+
+    def query_etag(self, *params: Optional[object]) -> str:
+        if all(p is None for p in params):
+            return self.etag
+        return hashlib.sha1(f"{self.etag}|{params!r}".encode()).hexdigest()
+
+
+class RecordListingCache:
+    """Per-stream listing cache, refreshed from one full listing and invalidated on ingest/eviction."""
+
+    def __init__(self, loader: Callable[[], Awaitable[Dict[str, List[RecordFileBaseModel]]]], ttl: float = DEFAULT_LISTING_TTL) -> None:
+        self._loader = loader
+        self.ttl = ttl
+        self._listings: Dict[str, StreamListing] = {}
+        self._stale: Set[str] = set()
+        self._loaded_at = float("-inf")
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def invalidate(self, stream_name: Optional[str] = None) -> None:
+        if stream_name is None:
+            self._loaded_at = float("-inf")
+        else:
+            self._stale.add(stream_name)
+
+    async def _refresh(self) -> None:
+        # Invalidations arriving while the listing is in flight must survive this refresh
+        stale = set(self._stale)
+        self._stale.clear()
+        started_at = time.monotonic()
+        try:
+            grouped = await self._loader()
+        except Exception:
+            self._stale |= stale
+            raise
+        listings: Dict[str, StreamListing] = {}
+        rebuilt = 0
+        for name, records in grouped.items():
+            # Keep unchanged listings, with their serialized body and gzip, instead of re-rendering every stream
+            listing = self._listings.get(name)
+            if listing is None or listing.signature != listing_signature(records):
+                listing = StreamListing(name, records)
+                rebuilt += 1
+            listings[name] = listing
+        self._listings = listings
+        self._loaded_at = started_at
+        logger.debug("Listing refresh rebuilt %d of %d streams", rebuilt, len(listings))
+
+    async def _join_refresh(self) -> None:
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh())
+        # Concurrent callers share one PROPFIND; shield it from a disconnecting client
+        await asyncio.shield(self._refresh_task)
+
+    async def get(self, stream_name: str) -> StreamListing:
+        expired = time.monotonic() - self._loaded_at >= self.ttl
+        if expired or stream_name in self._stale:
+            await self._join_refresh()
+            # The refresh we joined may have listed before this stream was invalidated
+            if stream_name in self._stale:
+                await self._join_refresh()
+        listing = self._listings.get(stream_name)
+        if listing is None:
+            listing = StreamListing(stream_name, [])
+        return listing
@@ -1,3 +1,3 @@
 source ./.venv/bin/activate
-uvicorn api:app --port 11985 --host="0.0.0.0"
+uvicorn api:app --port 11985 --host="0.0.0.0" --timeout-graceful-shutdown 10
 # python ./api.py
@@ -0,0 +1,182 @@
+import abc
+import asyncio
+import email.utils
+import logging
+import mimetypes
+import os
+import shutil
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles
+
+from webdav_client import CHUNK_SIZE, WebDavClient, WebDavEntry
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+
+class StorageBackend(abc.ABC):
+    """Storage operations used by the record manager; paths are relative to the backend root."""
+
+    async def init(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def upload_file(self, local_path: str, remote_relative_path: str) -> None: ...
+
+    @abc.abstractmethod
+    async def fetch_bytes(self, remote_relative_path: str) -> Optional[bytes]: ...
+
+    @abc.abstractmethod
+    async def stream_file(self, remote_relative_path: str, range_header: Optional[str] = None) -> Tuple[int, Dict[str, str], AsyncIterator[bytes]]: ...
+
+    @abc.abstractmethod
+    async def list_directory(self, remote_relative_dir: str = "") -> List[WebDavEntry]: ...
+
+    @abc.abstractmethod
+    async def delete_file(self, remote_relative_path: str) -> None: ...
+
+
+# WebDavClient already provides the full interface
+StorageBackend.register(WebDavClient)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range, returning inclusive (start, end) or None if unsatisfiable."""
+    if not range_header.startswith("bytes="):
+        return None
+    start_text, _, end_text = range_header[len("bytes="):].split(",")[0].strip().partition("-")
+    try:
+        if start_text == "":
+            length = int(end_text)
+            if length <= 0:
+                return None
+            return max(0, size - length), size - 1
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class LocalStorageBackend(StorageBackend):
+    """Recordings kept on a local filesystem directory."""
+
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = root_dir
+
+    async def init(self) -> None:
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def local_path(self, relative_path: str) -> str:
+        relative = os.path.normpath(relative_path.lstrip("/"))
+        if relative == ".." or relative.startswith("../"):
+            raise ValueError(f"path escapes storage root: {relative_path}")
+        return os.path.join(self.root_dir, relative)
+
+    def exists(self, relative_path: str) -> bool:
+        try:
+            return os.path.isfile(self.local_path(relative_path))
+        except ValueError:
+            return False
+
+    def _place_file(self, local_path: str, target: str) -> None:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_target = f"{target}.tmp"
+        try:
+            # A hard link makes "uploading" a recording on the same filesystem free
+            os.link(local_path, tmp_target)
+        except OSError:
+            shutil.copyfile(local_path, tmp_target)
+        os.replace(tmp_target, target)
+
+    async def upload_file(self, local_path: str, remote_relative_path: str) -> None:
+        target = self.local_path(remote_relative_path)
+        await asyncio.to_thread(self._place_file, local_path, target)
+        logger.info("Stored file in local tier %s", target)
+
+    async def fetch_bytes(self, remote_relative_path: str) -> Optional[bytes]:
+        try:
+            async with aiofiles.open(self.local_path(remote_relative_path), mode="rb") as f:
+                return await f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+
+    async def stream_file(self, remote_relative_path: str, range_header: Optional[str] = None) -> Tuple[int, Dict[str, str], AsyncIterator[bytes]]:
+        async def _empty() -> AsyncIterator[bytes]:
+            return
+            yield b""
+
+        try:
+            path = self.local_path(remote_relative_path)
+            size = (await asyncio.to_thread(os.stat, path)).st_size
+        except (FileNotFoundError, ValueError):
+            return 404, {}, _empty()
+        start, end = 0, size - 1
+        status = 200
+        headers = {"accept-ranges": "bytes"}
+        content_type, _ = mimetypes.guess_type(path)
+        if content_type:
+            headers["content-type"] = content_type
+        if range_header:
+            parsed = _parse_range(range_header, size)
+            if parsed is None:
+                return 416, {"content-range": f"bytes */{size}"}, _empty()
+            start, end = parsed
+            status = 206
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(end - start + 1)
+
+        async def _gen() -> AsyncIterator[bytes]:
+            async with aiofiles.open(path, mode="rb") as f:
+                await f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = await f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return status, headers, _gen()
+
+    def _scan(self, directory: str) -> List[WebDavEntry]:
+        entries: List[WebDavEntry] = []
+        try:
+            it = os.scandir(directory)
+        except FileNotFoundError:
+            return entries
+        with it:
+            for entry in it:
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                entries.append(
+                    WebDavEntry(
+                        name=entry.name,
+                        is_dir=is_dir,
+                        size=0 if is_dir else st.st_size,
+                        last_modified=email.utils.formatdate(st.st_mtime, usegmt=True),
+                    )
+                )
+        return entries
+
+    async def list_directory(self, remote_relative_dir: str = "") -> List[WebDavEntry]:
+        return await asyncio.to_thread(self._scan, self.local_path(remote_relative_dir.strip("/") or "."))
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def delete_file(self, remote_relative_path: str) -> None:
+        await asyncio.to_thread(self._remove, self.local_path(remote_relative_path))
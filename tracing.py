@@ -0,0 +1,183 @@
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__file__.split("/")[-1])
+
+DEFAULT_SLOW_THRESHOLD_MS = 1000
+DEFAULT_LOOP_LAG_INTERVAL = 0.5  # seconds between event loop lag probes
+LOOP_LAG_HISTORY = 600  # number of lag samples kept for reports
+PROFILE_MAX_SECONDS = 60
+PROFILE_SAMPLE_INTERVAL = 0.005  # 5ms
+PROFILE_TOP_N = 30
+
+
+class StageStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class Tracer:
+    """Collect per-stage timing spans and log operations slower than a threshold."""
+
+    def __init__(self, slow_threshold_ms: float = DEFAULT_SLOW_THRESHOLD_MS) -> None:
+        self.slow_threshold_ms = float(slow_threshold_ms)
+        self._stats: Dict[str, StageStats] = {}
+
+    @contextmanager
+    def span(self, stage: str, **fields: Any) -> Iterator[None]:
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000, failed=failed, **fields)
+
+    def record(self, stage: str, elapsed_ms: float, failed: bool = False, slow_log: bool = True, **fields: Any) -> None:
+        """Add one sample; `slow_log=False` keeps stats but never counts or logs it as slow."""
+        stats = self._stats.get(stage)
+        if stats is None:
+            stats = self._stats[stage] = StageStats()
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        if failed:
+            stats.errors += 1
+        if slow_log and self.slow_threshold_ms > 0 and elapsed_ms >= self.slow_threshold_ms:
+            stats.slow += 1
+            detail = " ".join(f"{k}={v}" for k, v in fields.items())
+            logger.warning("Slow operation %s took %.1f ms%s %s", stage, elapsed_ms, " (failed)" if failed else "", detail)
+        else:
+            logger.debug("Stage %s took %.1f ms", stage, elapsed_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {stage: stats.to_dict() for stage, stats in sorted(self._stats.items())}
+
+
+class LoopLagMonitor:
+    """Periodically measure how late the event loop wakes up a sleeping task."""
+
+    def __init__(self, interval: float = DEFAULT_LOOP_LAG_INTERVAL, slow_threshold_ms: float = DEFAULT_SLOW_THRESHOLD_MS) -> None:
+        self.interval = interval
+        self.slow_threshold_ms = float(slow_threshold_ms)
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+        self._samples: Deque[Tuple[float, float]] = collections.deque(maxlen=LOOP_LAG_HISTORY)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (loop.time() - expected) * 1000)
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self._samples.append((time.time(), lag_ms))
+            if self.slow_threshold_ms > 0 and lag_ms >= self.slow_threshold_ms:
+                logger.warning("Event loop blocked for %.1f ms", lag_ms)
+
+    def report(self, since: float = 0.0) -> Dict[str, Any]:
+        lags = [lag for ts, lag in self._samples if ts >= since]
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": len(lags),
+            "last_ms": round(self.last_lag_ms, 3),
+            "max_ms": round(max(lags), 3) if lags else 0.0,
+            "avg_ms": round(sum(lags) / len(lags), 3) if lags else 0.0,
+            "max_since_start_ms": round(self.max_lag_ms, 3),
+        }
+
+
+def _frame_key(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_filename.split('/')[-1]}:{code.co_name}:{frame.f_lineno}"
+
+
+def _sample_thread(thread_id: int, seconds: float, interval: float, stop: threading.Event) -> Tuple[int, Dict[str, int], Dict[str, int], Dict[str, int]]:
+    stacks: Dict[str, int] = collections.Counter()
+    self_counts: Dict[str, int] = collections.Counter()
+    total_counts: Dict[str, int] = collections.Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline and not stop.is_set():
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            names: List[str] = []
+            while frame is not None:
+                names.append(_frame_key(frame))
+                frame = frame.f_back
+            names.reverse()
+            samples += 1
+            stacks[";".join(names)] += 1
+            self_counts[names[-1]] += 1
+            for name in set(names):
+                total_counts[name] += 1
+        time.sleep(interval)
+    return samples, stacks, self_counts, total_counts
+
+
+async def sample_event_loop(seconds: float, interval: float = PROFILE_SAMPLE_INTERVAL, top_n: int = PROFILE_TOP_N) -> Dict[str, Any]:
+    """Sample the stack of the thread running the current event loop for `seconds`.
+
+    Sampling happens in a helper thread so the loop keeps serving requests; the
+    result lists the hottest functions and folded stacks (flamegraph input).
+    """
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    loop_thread_id = threading.get_ident()
+    stop = threading.Event()
+    try:
+        samples, stacks, self_counts, total_counts = await asyncio.to_thread(
+            _sample_thread, loop_thread_id, seconds, interval, stop
+        )
+    finally:
+        stop.set()
+
+    def _top(counter: Dict[str, int]) -> List[Dict[str, Any]]:
+        ranked = sorted(counter.items(), key=lambda x: x[1], reverse=True)[:top_n]
+        return [{"name": name, "samples": count, "ratio": round(count / samples, 4) if samples else 0.0} for name, count in ranked]
+
+    return {
+        "seconds": seconds,
+        "interval_ms": interval * 1000,
+        "samples": samples,
+        "top_self": _top(self_counts),
+        "top_total": _top(total_counts),
+        "folded_stacks": [f"{stack} {count}" for stack, count in sorted(stacks.items(), key=lambda x: x[1], reverse=True)[: top_n * 4]],
+    }
@@ -1,32 +1,91 @@
 import asyncio
+import hashlib
 import logging
 import os
 import urllib.parse
 import xml.etree.ElementTree as ET
 from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import aiofiles
 import aiohttp
 
+from bandwidth import BandwidthShaper
+
 logger = logging.getLogger(__file__.split("/")[-1])
 
 CHUNK_SIZE = 1024 * 1024
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+UPLOAD_BUFFER_COUNT = 3
+OC_NS = "http://owncloud.org/ns"
 
 
 class WebDavEntry:
-    def __init__(self, name: str, is_dir: bool, size: int, last_modified: str):
+    def __init__(self, name: str, is_dir: bool, size: int, last_modified: str, checksums: str = ""):
         self.name = name
         self.is_dir = is_dir
         self.size = size
         self.last_modified = last_modified
+        # ownCloud/Nextcloud style "SHA1:... MD5:..." when the server reports it
+        self.checksums = checksums
+
+
+class _HashingFileReader:
+    """Read a file into a small ring of reused buffers, hashing each chunk as it is read.
+
+    A buffer is refilled only after the two chunks following it were handed to
+    aiohttp, which drains the transport below its low-water mark after every
+    write larger than 64KB; transports flush in order, so by then the older
+    buffer has left the process.
+    """
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, "rb", buffering=0)
+        self.size = os.fstat(self._file.fileno()).st_size
+        self.hasher = hashlib.sha1()
+        self._buffers = [bytearray(UPLOAD_CHUNK_SIZE) for _ in range(UPLOAD_BUFFER_COUNT)]
+        self._index = 0
+
+    def read_chunk(self) -> memoryview:
+        buf = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        n = self._file.readinto(buf) or 0
+        view = memoryview(buf)[:n]
+        # hashlib releases the GIL on large inputs, so this stays off the event loop
+        self.hasher.update(view)
+        return view
+
+    def hash_all(self) -> str:
+        while self.read_chunk():
+            pass
+        digest = self.hasher.hexdigest()
+        self._file.seek(0)
+        self.hasher = hashlib.sha1()
+        return digest
+
+    def close(self) -> None:
+        self._file.close()
 
 
 class WebDavClient:
-    def __init__(self, hostname: str, login: str, password: str, root: str) -> None:
+    def __init__(
+        self,
+        hostname: str,
+        login: str,
+        password: str,
+        root: str,
+        shaper: Optional[BandwidthShaper] = None,
+        checksum_header: str = "",
+        verify_upload: bool = True,
+    ) -> None:
         self.hostname = hostname.rstrip("/")
         self.root = "/" + root.strip("/") + "/"
         self._auth = aiohttp.BasicAuth(login, password)
         self._session: Optional[aiohttp.ClientSession] = None
+        # Unlimited unless configured; shared by every upload and playback of this client
+        self.shaper = shaper if shaper is not None else BandwidthShaper()
+        # e.g. "OC-Checksum" for ownCloud/Nextcloud; costs an extra read pass before the PUT
+        self.checksum_header = checksum_header
+        # Off for servers that report getcontentlength lazily right after a PUT
+        self.verify_upload = verify_upload
 
     async def init(self) -> None:
         if self._session is not None:
@@ -58,6 +117,7 @@ class WebDavClient:
             logger.warning("Failed to ensure root directory: %s", e)
 
     async def close(self) -> None:
+        self.shaper.close()
         if self._session is not None:
             await self._session.close()
             self._session = None
@@ -103,24 +163,56 @@ class WebDavClient:
         if parent_dir:
             await self._ensure_dir(parent_dir)
         url = self._build_url(remote_relative_path)
+        reader = await asyncio.to_thread(_HashingFileReader, local_path)
+        # Content-Length avoids chunked encoding, which would copy every chunk again
+        headers = {"Content-Length": str(reader.size)}
 
-        async def _stream() -> AsyncIterator[bytes]:
-            async with aiofiles.open(local_path, mode="rb") as f:
-                while True:
-                    chunk = await f.read(CHUNK_SIZE)
-                    if not chunk:
-                        break
-                    yield chunk
+        async def _stream() -> AsyncIterator[memoryview]:
+            while True:
+                chunk = await asyncio.to_thread(reader.read_chunk)
+                if not chunk:
+                    break
+                await self.shaper.acquire_ingest(len(chunk))
+                yield chunk
 
         try:
-            async with self._session.put(url, data=_stream()) as resp:
+            if self.checksum_header:
+                # The header must precede the body, so hash in a separate pass
+                headers[self.checksum_header] = f"SHA1:{await asyncio.to_thread(reader.hash_all)}"
+            async with self._session.put(url, data=_stream(), headers=headers) as resp:
                 await resp.read()
                 if resp.status not in (200, 201, 204):
                     raise RuntimeError(f"Upload {local_path} to {url} failed, status: {resp.status}")
-                logger.info("Uploaded file to %s", url)
+            digest = reader.hasher.hexdigest()
+            if self.verify_upload:
+                await self._verify_upload(remote_relative_path, reader.size, digest)
+            logger.info("Uploaded file to %s (size=%d, sha1=%s)", url, reader.size, digest)
         except RuntimeError as e:
             logger.error("Upload failed: %s", e)
             raise
+        finally:
+            reader.close()
+
+    async def _verify_upload(self, remote_relative_path: str, size: int, sha1: str) -> None:
+        """Check the stored size, and the SHA1 if the server reports checksums, with one PROPFIND."""
+        entry = await self.stat(remote_relative_path)
+        if entry is None:
+            raise RuntimeError(f"Upload verification failed, {remote_relative_path} not found after PUT")
+        problem = None
+        if entry.size != size:
+            problem = f"stored {entry.size} bytes, expected {size}"
+        for checksum in entry.checksums.split():
+            algo, _, value = checksum.partition(":")
+            if problem is None and algo.upper() == "SHA1" and value.lower() != sha1:
+                problem = f"checksum {value} != {sha1}"
+        if problem is None:
+            return
+        # Never leave a truncated copy behind for listings and playback to pick up
+        try:
+            await self.delete_file(remote_relative_path)
+        except Exception as e:
+            logger.warning("Failed to delete bad upload %s: %s", remote_relative_path, e)
+        raise RuntimeError(f"Upload verification failed for {remote_relative_path}: {problem}")
 
     async def fetch_bytes(self, remote_relative_path: str) -> Optional[bytes]:
         if self._session is None:
@@ -142,9 +234,14 @@ class WebDavClient:
         resp = await self._session.get(url, headers=headers)
 
         async def _gen() -> AsyncIterator[bytes]:
-            async with resp:
-                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
-                    yield chunk
+            self.shaper.playback_started()
+            try:
+                async with resp:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        await self.shaper.acquire_playback(len(chunk))
+                        yield chunk
+            finally:
+                self.shaper.playback_finished()
 
         response_headers = {
             "content-type": resp.headers.get("Content-Type", "application/octet-stream"),
@@ -171,33 +268,79 @@ class WebDavClient:
             if resp.status not in (207, 200):
                 logger.error("PROPFIND %s failed, status=%s, body=%s", url, resp.status, text)
                 raise RuntimeError(f"PROPFIND failed: {resp.status}")
+        entries: List[WebDavEntry] = []
+        for entry in self._parse_propfind(text):
+            if entry.name == target.split("/")[-1] and entry.is_dir:
+                # skip the directory itself
+                continue
+            entries.append(entry)
+        return entries
+
+    async def stat(self, remote_relative_path: str) -> Optional[WebDavEntry]:
+        """PROPFIND a single file (Depth 0); None if it does not exist."""
+        if self._session is None:
+            raise RuntimeError("WebDavClient not initialized")
+        url = self._build_url(remote_relative_path)
+        body = f"""<?xml version=\"1.0\" encoding=\"utf-8\"?>\n<d:propfind xmlns:d=\"DAV:\" xmlns:oc=\"{OC_NS}\">\n  <d:prop>\n    <d:getcontentlength/>\n    <d:getlastmodified/>\n    <d:resourcetype/>\n    <oc:checksums/>\n  </d:prop>\n</d:propfind>\n"""
+        headers = {"Depth": "0", "Content-Type": "application/xml"}
+        async with self._session.request("PROPFIND", url, data=body, headers=headers) as resp:
+            text = await resp.text()
+            if resp.status == 404:
+                return None
+            if resp.status not in (207, 200):
+                logger.error("PROPFIND %s failed, status=%s, body=%s", url, resp.status, text)
+                raise RuntimeError(f"PROPFIND failed: {resp.status}")
+        entries = self._parse_propfind(text)
+        return entries[0] if entries else None
+
+    def _parse_propfind(self, text: str) -> List[WebDavEntry]:
         try:
             root = ET.fromstring(text)
         except Exception:
             logger.exception("Parse PROPFIND response failed")
             raise
-        ns = {"d": "DAV:"}
+        ns = {"d": "DAV:", "oc": OC_NS}
         entries: List[WebDavEntry] = []
         for response in root.findall("d:response", ns):
             href = response.findtext("d:href", default="", namespaces=ns)
             name = urllib.parse.unquote(href).rstrip("/").split("/")[-1]
             if name == "":
                 continue
-            prop = response.find("d:propstat/d:prop", ns)
-            if prop is None:
+            # Servers put unknown properties in a separate 404 propstat; merge the found ones
+            props = [
+                propstat.find("d:prop", ns)
+                for propstat in response.findall("d:propstat", ns)
+                if " 200 " in (propstat.findtext("d:status", default=" 200 ", namespaces=ns) or " 200 ")
+            ]
+            props = [prop for prop in props if prop is not None]
+            if not props:
                 continue
-            res_type = prop.find("d:resourcetype", ns)
+
+            def _find(path: str) -> Optional[ET.Element]:
+                for prop in props:
+                    found = prop.find(path, ns)
+                    if found is not None:
+                        return found
+                return None
+
+            res_type = _find("d:resourcetype")
             is_dir = res_type is not None and res_type.find("d:collection", ns) is not None
-            if name == target.split("/")[-1] and is_dir:
-                # skip the directory itself
-                continue
-            size_text = prop.findtext("d:getcontentlength", default="0", namespaces=ns) or "0"
-            last_modified = prop.findtext("d:getlastmodified", default="", namespaces=ns) or ""
+            size_elem = _find("d:getcontentlength")
+            last_modified_elem = _find("d:getlastmodified")
+            checksum_elem = _find("oc:checksums/oc:checksum")
             try:
-                size = int(size_text)
+                size = int((size_elem.text if size_elem is not None else "0") or "0")
             except ValueError:
                 size = 0
-            entries.append(WebDavEntry(name=name, is_dir=is_dir, size=size, last_modified=last_modified))
+            entries.append(
+                WebDavEntry(
+                    name=name,
+                    is_dir=is_dir,
+                    size=size,
+                    last_modified=(last_modified_elem.text if last_modified_elem is not None else "") or "",
+                    checksums=(checksum_elem.text if checksum_elem is not None else "") or "",
+                )
+            )
         return entries
 
     async def delete_file(self, remote_relative_path: str) -> None:
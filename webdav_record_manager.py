@@ -1,4 +1,5 @@
 import asyncio
+import email.utils
 import logging
 import os
 import subprocess
@@ -9,7 +10,14 @@ from typing import AsyncIterator, Dict, List, Optional, Tuple
 import aiofiles
 import yaml
 
-from RecordFileManager import RecordFileBaseModel
+from bandwidth import BandwidthShaper
+from backlog import DEFAULT_BACKLOG_CONCURRENCY, DEFAULT_BACKLOG_SETTLE_SECONDS
+from coordination import LeaderElection, SharedCoverCache
+from record_events import RecordEventBus
+from record_listing import DEFAULT_LISTING_TTL, RecordListingCache
+from RecordFileManager import BYTES_OF_GB, RecordFileBaseModel, extract_record_timestamp
+from storage_backend import LocalStorageBackend, StorageBackend
+from tracing import DEFAULT_LOOP_LAG_INTERVAL, DEFAULT_SLOW_THRESHOLD_MS, LoopLagMonitor, Tracer
 from webdav_client import CHUNK_SIZE, WebDavClient, WebDavEntry
 
 logger = logging.getLogger(__file__.split("/")[-1])
@@ -17,6 +25,17 @@ logger = logging.getLogger(__file__.split("/")[-1])
 VALID_MEDIA_TYPES = {"flv", "mp4"}
 DEFAULT_MAX_STORAGE_BYTES = 53687091200  # 50GB
 STREAM_COVER_CACHE_TTL = 300  # 5 minutes cache TTL
+STREAM_COVER_TIMEOUT = 15  # whole get_stream_cover request
+STREAM_COVER_FFMPEG_TIMEOUT = 10
+STREAM_COVER_LOCK_TIMEOUT = 12  # wait for another worker generating the same cover
+STREAM_COVER_MIN_FFMPEG_TIME = 2  # not worth starting ffmpeg with less time left than this
+DEFAULT_LOW_WATERMARK_RATIO = 0.9  # evict down to 90% of max_storage_bytes
+DEFAULT_CLEANUP_DEBOUNCE = 5  # seconds to coalesce upload events before scanning
+DEFAULT_DELETE_CONCURRENCY = 4
+JANITOR_POLL_INTERVAL = 10  # leader checks cleanup requests from other workers
+DEFAULT_HOT_MAX_GB = 10
+DEFAULT_HOT_MAX_HOURS = 24
+DEFAULT_MIGRATE_INTERVAL = 60
 
 
 class WebDavRecordManager:
@@ -27,26 +46,104 @@ class WebDavRecordManager:
             cfg = yaml.safe_load(f)
         webdav_cfg: Dict[str, str] = cfg.get("webdav", {})
         record_cfg: Dict[str, str] = cfg.get("record", {})
+        debug_cfg: Dict[str, str] = cfg.get("debug", {}) or {}
+        coord_cfg: Dict[str, str] = cfg.get("coordination", {}) or {}
+        tiering_cfg: Dict[str, str] = cfg.get("tiering", {}) or {}
+        self.local_record_dir = record_cfg.get("local_dir", "./live")
+        # Shared by all uvicorn workers on this host
+        coord_dir = coord_cfg.get("dir", os.path.join(self.local_record_dir, ".coord"))
         self._client = WebDavClient(
             hostname=webdav_cfg.get("hostname", ""),
             login=webdav_cfg.get("login", ""),
             password=webdav_cfg.get("password", ""),
             root=webdav_cfg.get("root", "/"),
+            shaper=BandwidthShaper(
+                ingest_rate=float(webdav_cfg.get("ingest_bytes_per_sec", 0)),
+                playback_rate=float(webdav_cfg.get("playback_bytes_per_sec", 0)),
+                ingest_min_rate=float(webdav_cfg.get("ingest_min_bytes_per_sec", 0)),
+                link_rate=float(webdav_cfg.get("link_bytes_per_sec", 0)),
+                state_dir=os.path.join(coord_dir, "bandwidth"),
+            ),
+            checksum_header=webdav_cfg.get("checksum_header", "") or "",
+            verify_upload=bool(webdav_cfg.get("verify_upload", True)),
         )
-        self.local_record_dir = record_cfg.get("local_dir", "./live")
         self.local_cover_dir = record_cfg.get("cover_dir", "./live/cover")
         self.remote_cover_dir = record_cfg.get("cover_remote_dir", "cover")
+        # Optional hot tier: new recordings land on local disk and migrate to WebDAV (cold tier) later
+        self._hot: Optional[LocalStorageBackend] = None
+        if tiering_cfg.get("enabled", False):
+            self._hot = LocalStorageBackend(tiering_cfg.get("hot_dir", "./hot"))
+        self.hot_max_bytes = int(float(tiering_cfg.get("hot_max_gb", DEFAULT_HOT_MAX_GB)) * BYTES_OF_GB)
+        self.hot_max_seconds = float(tiering_cfg.get("hot_max_hours", DEFAULT_HOT_MAX_HOURS)) * 3600
+        self.migrate_interval = float(tiering_cfg.get("migrate_interval", DEFAULT_MIGRATE_INTERVAL))
+        self._migrate_task: Optional[asyncio.Task] = None
+        # Eviction and migration both move files between tiers and must not interleave
+        self._tier_lock = asyncio.Lock()
         self.max_storage_bytes: int = int(webdav_cfg.get("max_storage_bytes", DEFAULT_MAX_STORAGE_BYTES))
+        # Eviction starts above max_storage_bytes (high watermark) and deletes down to the low watermark
+        self.low_watermark_bytes: int = int(
+            webdav_cfg.get("low_watermark_bytes", self.max_storage_bytes * DEFAULT_LOW_WATERMARK_RATIO)
+        )
+        self.cleanup_debounce = float(webdav_cfg.get("cleanup_debounce", DEFAULT_CLEANUP_DEBOUNCE))
+        self.delete_concurrency = max(1, int(webdav_cfg.get("delete_concurrency", DEFAULT_DELETE_CONCURRENCY)))
+        self.backlog_on_startup = bool(record_cfg.get("backlog_on_startup", False))
+        self.backlog_concurrency = int(record_cfg.get("backlog_concurrency", DEFAULT_BACKLOG_CONCURRENCY))
+        self.backlog_settle_seconds = float(record_cfg.get("backlog_settle_seconds", DEFAULT_BACKLOG_SETTLE_SECONDS))
         # Stream cover cache: {stream_name: (timestamp, cover_bytes)}
         self._stream_cover_cache: Dict[str, Tuple[float, bytes]] = {}
         self._stream_cover_tasks: Dict[str, asyncio.Task] = {}
+        self._shared_covers = SharedCoverCache(os.path.join(coord_dir, "stream_cover"), STREAM_COVER_CACHE_TTL)
+        self._leader = LeaderElection(os.path.join(coord_dir, "leader.lock"))
+        self.events = RecordEventBus(os.path.join(coord_dir, "events"))
+        self.listings = RecordListingCache(self._load_listings, float(record_cfg.get("listing_cache_ttl", DEFAULT_LISTING_TTL)))
+        # Events from every worker invalidate the cached listing of their stream
+        self.events.add_listener(lambda event: self.listings.invalidate(event.get("stream_name")))
+        # Non-leader workers touch this file to ask the leader's janitor for a pass
+        self._cleanup_request_path = os.path.join(coord_dir, "cleanup.request")
+        self._cleanup_event = asyncio.Event()
+        self._janitor_task: Optional[asyncio.Task] = None
+        slow_threshold_ms = float(debug_cfg.get("slow_threshold_ms", DEFAULT_SLOW_THRESHOLD_MS))
+        self.profile_token: str = str(debug_cfg.get("profile_token", "") or "")
+        self.tracer = Tracer(slow_threshold_ms)
+        self.loop_monitor = LoopLagMonitor(
+            interval=float(debug_cfg.get("loop_lag_interval", DEFAULT_LOOP_LAG_INTERVAL)),
+            slow_threshold_ms=slow_threshold_ms,
+        )
 
     async def init(self) -> None:
         await self._client.init()
+        if self._hot is not None:
+            await self._hot.init()
+        self._leader.start()
+        await self.events.start()
+        self.loop_monitor.start()
+        self._janitor_task = asyncio.create_task(self._janitor_loop())
+        if self._hot is not None:
+            self._migrate_task = asyncio.create_task(self._migrate_loop())
 
     async def close(self) -> None:
+        for task in (self._janitor_task, self._migrate_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._janitor_task = None
+        self._migrate_task = None
+        await self.loop_monitor.stop()
+        await self.events.stop()
+        await self._leader.stop()
         await self._client.close()
 
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_leader
+
+    def bandwidth_snapshot(self) -> Dict[str, object]:
+        return self._client.shaper.snapshot()
+
     def _cover_name(self, file_name: str) -> str:
         base, _ = os.path.splitext(file_name)
         return f"{base}.jpg"
@@ -54,6 +151,19 @@ class WebDavRecordManager:
     def _cover_remote_path(self, cover_file_name: str) -> str:
         return f"{self.remote_cover_dir.strip('/')}/{cover_file_name}" if self.remote_cover_dir else cover_file_name
 
+    @property
+    def _ingest_backend(self) -> StorageBackend:
+        return self._hot if self._hot is not None else self._client
+
+    def _tiers(self) -> List[StorageBackend]:
+        """Backends in lookup order, hot tier first."""
+        return [self._hot, self._client] if self._hot is not None else [self._client]
+
+    async def _backend_for(self, remote_relative_path: str) -> StorageBackend:
+        if self._hot is not None and await asyncio.to_thread(self._hot.exists, remote_relative_path):
+            return self._hot
+        return self._client
+
     def _resolve_local_file(self, incoming_path: str, file_name: str) -> str:
         if os.path.isfile(incoming_path):
             return incoming_path
@@ -113,54 +223,68 @@ class WebDavRecordManager:
             logger.warning("Local record file not found: %s", local_file_path)
             return
         logger.info("Uploading record %s for stream %s", file_name, stream_name)
-        await self._client.upload_file(local_file_path, file_name)
-        cover_path = await self._generate_cover(local_file_path, file_name)
-        if cover_path:
-            try:
-                await self._client.upload_file(cover_path, self._cover_remote_path(self._cover_name(file_name)))
-            finally:
-                await self._safe_remove(cover_path)
-        await self._safe_remove(local_file_path)
-        # Cleanup old files if storage limit exceeded
-        await self._limit_storage_size()
-
-    def _extract_timestamp(self, file_name: str) -> int:
-        parts = file_name.split(".")
-        if len(parts) < 3:
-            return 0
-        # format: stream.timestamp.xxx.ext
-        try:
-            return int(parts[-2])
-        except ValueError:
-            return 0
+        file_size = os.path.getsize(local_file_path)
+        with self.tracer.span("dvr.total", file=file_name):
+            with self.tracer.span("dvr.upload", file=file_name):
+                await self._ingest_backend.upload_file(local_file_path, file_name)
+            with self.tracer.span("dvr.ffmpeg_cover", file=file_name):
+                cover_path = await self._generate_cover(local_file_path, file_name)
+            if cover_path:
+                try:
+                    with self.tracer.span("dvr.cover_upload", file=file_name):
+                        await self._ingest_backend.upload_file(cover_path, self._cover_remote_path(self._cover_name(file_name)))
+                finally:
+                    await self._safe_remove(cover_path)
+            with self.tracer.span("dvr.remove_local", file=file_name):
+                await self._safe_remove(local_file_path)
+        self.events.publish("add", stream_name, self._record_model(file_name, file_size).model_dump())
+        # Cleanup runs in the background janitor, bursts of uploads share one scan
+        self.request_storage_cleanup()
+
+    def _is_media_entry(self, entry: WebDavEntry) -> bool:
+        return not entry.is_dir and entry.name.split(".")[-1].lower() in VALID_MEDIA_TYPES
+
+    async def _list_media(self) -> List[Tuple[WebDavEntry, StorageBackend]]:
+        """Media files across all tiers; a file present in several tiers is reported from the first."""
+        tiers = self._tiers()
+        listings = await asyncio.gather(*(backend.list_directory("") for backend in tiers))
+        seen: Dict[str, Tuple[WebDavEntry, StorageBackend]] = {}
+        for backend, entries in zip(tiers, listings):
+            for entry in entries:
+                if self._is_media_entry(entry) and entry.name not in seen:
+                    seen[entry.name] = (entry, backend)
+        return list(seen.values())
+
+    def _record_model(self, file_name: str, file_size: int) -> RecordFileBaseModel:
+        return RecordFileBaseModel(
+            file_name=file_name,
+            timestamp=extract_record_timestamp(file_name),
+            file_size=file_size,
+            download_url=f"/stream/record/d/{file_name}",
+            player_url=f"/stream/record/p/{file_name}",
+            thumb_url=f"/stream/record/cover/{self._cover_name(file_name)}",
+        )
 
     async def list_records(self, stream_name: str) -> List[RecordFileBaseModel]:
-        entries = await self._client.list_directory("")
+        media = await self._list_media()
         files: List[RecordFileBaseModel] = []
-        for entry in entries:
-            if entry.is_dir:
-                continue
-            suffix = entry.name.split(".")[-1].lower()
-            if suffix not in VALID_MEDIA_TYPES:
-                continue
+        for entry, _ in media:
             if not entry.name.startswith(f"{stream_name}."):
                 continue
-            timestamp = self._extract_timestamp(entry.name)
-            files.append(
-                RecordFileBaseModel(
-                    file_name=entry.name,
-                    timestamp=timestamp,
-                    file_size=entry.size,
-                    download_url=f"/stream/record/d/{entry.name}",
-                    player_url=f"/stream/record/p/{entry.name}",
-                    thumb_url=f"/stream/record/cover/{self._cover_name(entry.name)}",
-                )
-            )
+            files.append(self._record_model(entry.name, entry.size))
         files.sort(key=lambda x: x.timestamp)
         return files
 
+    async def _load_listings(self) -> Dict[str, List[RecordFileBaseModel]]:
+        """All records grouped by stream name, from a single listing of every tier."""
+        grouped: Dict[str, List[RecordFileBaseModel]] = {}
+        for entry, _ in await self._list_media():
+            grouped.setdefault(entry.name.split(".")[0], []).append(self._record_model(entry.name, entry.size))
+        return grouped
+
     async def stream_record(self, file_name: str, range_header: Optional[str]) -> Tuple[int, Dict[str, str], AsyncIterator[bytes]]:
-        status, headers, body = await self._client.stream_file(file_name, range_header)
+        backend = await self._backend_for(file_name)
+        status, headers, body = await backend.stream_file(file_name, range_header)
         # ensure headers include sane defaults
         headers.setdefault("content-type", "video/mp4")
         headers.setdefault("accept-ranges", "bytes")
@@ -171,9 +295,10 @@ class WebDavRecordManager:
         if cover_name.lower().endswith((".flv", ".mp4")):
             target = self._cover_name(cover_name)
         remote_path = self._cover_remote_path(target)
-        return await self._client.fetch_bytes(remote_path)
+        backend = await self._backend_for(remote_path)
+        return await backend.fetch_bytes(remote_path)
 
-    async def _generate_stream_cover(self, stream_name: str) -> Optional[bytes]:
+    async def _generate_stream_cover(self, stream_name: str, timeout: float = STREAM_COVER_FFMPEG_TIMEOUT) -> Optional[bytes]:
         """Generate cover for live stream from RTMP source."""
         os.makedirs(self.local_cover_dir, exist_ok=True)
         cover_output = os.path.join(self.local_cover_dir, f"img_cover_{stream_name}.jpg")
@@ -190,14 +315,14 @@ class WebDavRecordManager:
             cover_output,
             "-y",
         ]
+        process = None
         try:
             process = await asyncio.create_subprocess_exec(
                 *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
             )
             try:
-                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=10)
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
             except asyncio.TimeoutError:
-                process.kill()
                 logger.warning("Generate stream cover timeout for %s", stream_name)
                 return None
             if process.returncode != 0:
@@ -218,6 +343,12 @@ class WebDavRecordManager:
             logger.error("Failed to generate stream cover for %s: %s", stream_name, traceback.format_exc())
             return None
         finally:
+            # Also reached on cancellation, which must not leave ffmpeg running
+            if process is not None and process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
             # Clean up generated file
             try:
                 if os.path.exists(cover_output):
@@ -225,6 +356,30 @@ class WebDavRecordManager:
             except Exception:
                 logger.warning("Failed to remove cover file %s", cover_output)
 
+    async def _generate_shared_stream_cover(self, stream_name: str) -> Optional[bytes]:
+        """Generate a stream cover once across all workers, publishing it to the shared cache."""
+        # Lock wait and ffmpeg share one budget that ends before the caller's timeout
+        deadline = time.monotonic() + STREAM_COVER_TIMEOUT - 1
+        lock = self._shared_covers.lock(stream_name)
+        if not await lock.acquire(STREAM_COVER_LOCK_TIMEOUT):
+            logger.warning("Timed out waiting for cover generation lock of %s", stream_name)
+            return None
+        try:
+            # The lock holder before us may have just produced it
+            shared = await self._shared_covers.get(stream_name)
+            if shared is not None:
+                return shared[1]
+            remaining = deadline - time.monotonic()
+            if remaining < STREAM_COVER_MIN_FFMPEG_TIME:
+                logger.warning("No time left to generate cover for %s after waiting for the lock", stream_name)
+                return None
+            cover_bytes = await self._generate_stream_cover(stream_name, min(STREAM_COVER_FFMPEG_TIMEOUT, remaining))
+            if cover_bytes:
+                await self._shared_covers.put(stream_name, cover_bytes)
+            return cover_bytes
+        finally:
+            lock.release()
+
     async def get_stream_cover(self, stream_name: str) -> Optional[bytes]:
         """Get stream cover with local cache support (5min TTL)."""
         current_time = time.time()
@@ -239,13 +394,20 @@ class WebDavRecordManager:
                 # Cache expired, remove it
                 del self._stream_cover_cache[stream_name]
 
+        # Another worker may already have generated it
+        shared = await self._shared_covers.get(stream_name)
+        if shared is not None:
+            self._stream_cover_cache[stream_name] = shared
+            return shared[1]
+
         # If there's already a generation task, wait for it
         if stream_name in self._stream_cover_tasks:
             existing_task = self._stream_cover_tasks[stream_name]
             if not existing_task.done():
                 logger.info("Waiting for ongoing cover generation for %s", stream_name)
                 try:
-                    result = await asyncio.wait_for(existing_task, timeout=15)
+                    # Shielded: a waiter giving up must not cancel the generation others wait on
+                    result = await asyncio.wait_for(asyncio.shield(existing_task), timeout=STREAM_COVER_TIMEOUT)
                     if result:
                         self._stream_cover_cache[stream_name] = (current_time, result)
                     return result
@@ -270,11 +432,11 @@ class WebDavRecordManager:
 
         # Generate new cover
         logger.info("Generating new cover for stream %s", stream_name)
-        generation_task = asyncio.create_task(self._generate_stream_cover(stream_name))
+        generation_task = asyncio.create_task(self._generate_shared_stream_cover(stream_name))
         self._stream_cover_tasks[stream_name] = generation_task
 
         try:
-            cover_bytes = await asyncio.wait_for(generation_task, timeout=15)
+            cover_bytes = await asyncio.wait_for(generation_task, timeout=STREAM_COVER_TIMEOUT)
             if cover_bytes:
                 self._stream_cover_cache[stream_name] = (current_time, cover_bytes)
             return cover_bytes
@@ -289,29 +451,65 @@ class WebDavRecordManager:
             if stream_name in self._stream_cover_tasks:
                 del self._stream_cover_tasks[stream_name]
 
-    async def _limit_storage_size(self) -> None:
-        """Limit remote storage size by deleting oldest files when exceeding limit."""
-        try:
-            entries = await self._client.list_directory("")
-            media_files: List[Tuple[WebDavEntry, int]] = []
+    def request_storage_cleanup(self) -> None:
+        """Ask the janitor for an eviction pass; requests arriving close together are merged."""
+        self._cleanup_event.set()
 
-            for entry in entries:
-                if entry.is_dir:
+    def _cleanup_requested_by_peers(self, since: float) -> bool:
+        try:
+            return os.stat(self._cleanup_request_path).st_mtime > since
+        except FileNotFoundError:
+            return False
+
+    def _touch_cleanup_request(self) -> None:
+        with open(self._cleanup_request_path, "a"):
+            os.utime(self._cleanup_request_path)
+
+    async def _janitor_loop(self) -> None:
+        """Single background eviction task; only the leader worker scans and deletes."""
+        last_pass = time.time()
+        while True:
+            try:
+                await asyncio.wait_for(self._cleanup_event.wait(), timeout=JANITOR_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                if not (self._leader.is_leader and await asyncio.to_thread(self._cleanup_requested_by_peers, last_pass)):
                     continue
-                suffix = entry.name.split(".")[-1].lower()
-                if suffix in VALID_MEDIA_TYPES:
-                    timestamp = self._extract_timestamp(entry.name)
-                    media_files.append((entry, timestamp))
+            # Let a burst of segments finish before scanning once for all of them
+            await asyncio.sleep(self.cleanup_debounce)
+            self._cleanup_event.clear()
+            try:
+                if not self._leader.is_leader:
+                    await asyncio.to_thread(self._touch_cleanup_request)
+                    continue
+                last_pass = time.time()
+                with self.tracer.span("janitor.limit_storage"):
+                    await self._limit_storage_size()
+            except Exception:
+                logger.error("Storage janitor pass failed: %s", traceback.format_exc())
+
+    async def _limit_storage_size(self) -> None:
+        """Delete oldest files once storage exceeds the high watermark, down to the low watermark."""
+        # Otherwise a victim being migrated is re-uploaded to the cold tier after its remove event
+        async with self._tier_lock:
+            await self._evict_to_low_watermark()
+
+    async def _evict_to_low_watermark(self) -> None:
+        try:
+            # Usage spans every tier, each file counted once
+            media_files: List[Tuple[WebDavEntry, int]] = [
+                (entry, extract_record_timestamp(entry.name)) for entry, _ in await self._list_media()
+            ]
 
             cover_size_map: Dict[str, int] = {}
             if self.remote_cover_dir:
-                try:
-                    cover_entries = await self._client.list_directory(self.remote_cover_dir)
-                    for ce in cover_entries:
-                        if not ce.is_dir and ce.name.lower().endswith(".jpg"):
-                            cover_size_map[ce.name] = ce.size
-                except Exception as e:
-                    logger.warning("Failed to list cover directory %s: %s", self.remote_cover_dir, e)
+                for backend in self._tiers():
+                    try:
+                        cover_entries = await backend.list_directory(self.remote_cover_dir)
+                        for ce in cover_entries:
+                            if not ce.is_dir and ce.name.lower().endswith(".jpg"):
+                                cover_size_map.setdefault(ce.name, ce.size)
+                    except Exception as e:
+                        logger.warning("Failed to list cover directory %s: %s", self.remote_cover_dir, e)
 
             total_size = sum(entry.size for entry, _ in media_files)
             total_size += sum(cover_size_map.values())
@@ -322,27 +520,94 @@ class WebDavRecordManager:
 
             media_files.sort(key=lambda x: x[1])
 
-            deleted_count = 0
+            # Pick victims up front so concurrent deletions never race on the same file
+            victims: List[Tuple[WebDavEntry, int]] = []
+            remaining = total_size
             for entry, timestamp in media_files:
-                if total_size <= self.max_storage_bytes:
+                if remaining <= self.low_watermark_bytes:
                     break
-
-                logger.info("Deleting old file %s (timestamp=%s, size=%d) to free space", entry.name, timestamp, entry.size)
-
-                await self._client.delete_file(entry.name)
-                total_size -= entry.size
-                deleted_count += 1
-
-                cover_file_name = self._cover_name(entry.name)
-                cover_remote_path = self._cover_remote_path(cover_file_name)
-                try:
-                    await self._client.delete_file(cover_remote_path)
-                    if cover_file_name in cover_size_map:
-                        total_size -= cover_size_map[cover_file_name]
-                    logger.info("Deleted associated cover file %s", cover_remote_path)
-                except Exception as e:
-                    logger.warning("Failed to delete cover file %s: %s", cover_remote_path, e)
+                victims.append((entry, timestamp))
+                remaining -= entry.size + cover_size_map.get(self._cover_name(entry.name), 0)
+
+            semaphore = asyncio.Semaphore(self.delete_concurrency)
+
+            async def _delete(entry: WebDavEntry, timestamp: int) -> int:
+                async with semaphore:
+                    logger.info("Deleting old file %s (timestamp=%s, size=%d) to free space", entry.name, timestamp, entry.size)
+                    try:
+                        # Delete from every tier, a file being migrated may exist in both
+                        for backend in self._tiers():
+                            await backend.delete_file(entry.name)
+                    except Exception as e:
+                        logger.warning("Failed to delete file %s: %s", entry.name, e)
+                        return 0
+                    freed = entry.size
+                    self.events.publish("remove", entry.name.split(".")[0], self._record_model(entry.name, entry.size).model_dump())
+                    cover_file_name = self._cover_name(entry.name)
+                    cover_remote_path = self._cover_remote_path(cover_file_name)
+                    try:
+                        for backend in self._tiers():
+                            await backend.delete_file(cover_remote_path)
+                        freed += cover_size_map.get(cover_file_name, 0)
+                        logger.info("Deleted associated cover file %s", cover_remote_path)
+                    except Exception as e:
+                        logger.warning("Failed to delete cover file %s: %s", cover_remote_path, e)
+                    return freed
+
+            freed_sizes = await asyncio.gather(*(_delete(entry, timestamp) for entry, timestamp in victims))
+            deleted_count = sum(1 for freed in freed_sizes if freed > 0)
+            total_size -= sum(freed_sizes)
 
             logger.info("Storage cleanup completed: deleted %d files, new total size: %d bytes", deleted_count, total_size)
         except Exception:
             logger.error("Failed to limit storage size: %s", traceback.format_exc())
+
+    def _entry_mtime(self, entry: WebDavEntry) -> float:
+        try:
+            return email.utils.parsedate_to_datetime(entry.last_modified).timestamp()
+        except (TypeError, ValueError):
+            return time.time()
+
+    async def _migrate_loop(self) -> None:
+        """Periodically move recordings out of the hot tier; only the leader migrates."""
+        while True:
+            await asyncio.sleep(self.migrate_interval)
+            if not self._leader.is_leader:
+                continue
+            try:
+                with self.tracer.span("tiering.migrate"):
+                    await self._migrate_cold()
+            except Exception:
+                logger.error("Tier migration failed: %s", traceback.format_exc())
+
+    async def _migrate_cold(self) -> None:
+        """Upload hot recordings beyond the hot age/size budget to WebDAV, then drop the local copy."""
+        if self._hot is None:
+            return
+        entries = [e for e in await self._hot.list_directory("") if self._is_media_entry(e)]
+        entries.sort(key=self._entry_mtime)
+        hot_size = sum(e.size for e in entries)
+        oldest_allowed = time.time() - self.hot_max_seconds
+        migrated = 0
+        for entry in entries:
+            if hot_size <= self.hot_max_bytes and self._entry_mtime(entry) >= oldest_allowed:
+                break
+            cover_remote_path = self._cover_remote_path(self._cover_name(entry.name))
+            # Locked per file so an eviction pass waits for at most one upload
+            async with self._tier_lock:
+                if not await asyncio.to_thread(self._hot.exists, entry.name):
+                    # Evicted while we waited for the lock
+                    hot_size -= entry.size
+                    continue
+                logger.info("Migrating %s (size=%d) from hot tier to WebDAV", entry.name, entry.size)
+                with self.tracer.span("tiering.upload", file=entry.name):
+                    await self._client.upload_file(self._hot.local_path(entry.name), entry.name)
+                    if await asyncio.to_thread(self._hot.exists, cover_remote_path):
+                        await self._client.upload_file(self._hot.local_path(cover_remote_path), cover_remote_path)
+                # Only drop the hot copy once the cold tier holds the file
+                await self._hot.delete_file(entry.name)
+                await self._hot.delete_file(cover_remote_path)
+            hot_size -= entry.size
+            migrated += 1
+        if migrated:
+            logger.info("Tier migration completed: moved %d files, hot tier size %d bytes", migrated, hot_size)